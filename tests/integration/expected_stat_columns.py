@@ -55,11 +55,17 @@ EXPECTED_STATE_SUM_COLS = [
     "Circulation_For_ChildrenMaterials",
     "Circulation_For_ChildrenMaterials_ImputationFlag",
     "Circulation_For_ElectronicContentUse",
+    "Circulation_For_ElectronicContentUse_ImputationFlag",
     "Circulation_For_ElectronicInfo_SuccessfulRetrieval",
+    "Circulation_For_ElectronicInfo_SuccessfulRetrieval_ImputationFlag",
     "Circulation_For_ElectronicMaterials",
+    "Circulation_For_ElectronicMaterials_ImputationFlag",
     "Circulation_For_PhysicalItems",
+    "Circulation_For_PhysicalItems_ImputationFlag",
     "Circulation_Total_CountOf_PhysicalAndElectronicCirculation_And_ElectronicSuccessfulRetrieval",
+    "Circulation_Total_CountOf_PhysicalAndElectronicCirculation_And_ElectronicSuccessfulRetrieval_ImputationFlag",
     "Circulation_Total_Transactions",
+    "Circulation_Total_Transactions_ImputationFlag",
     "ElectronicCollections_From_LocalOrOther",
     "ElectronicCollections_From_Other_ImputationFlag",
     "ElectronicCollections_From_State",
@@ -88,6 +94,7 @@ EXPECTED_STATE_SUM_COLS = [
     "LibraryCollections_CountOf_EBooks",
     "LibraryCollections_CountOf_EBooks_ImputationFlag",
     "LibraryCollections_CountOf_PrintMaterials",
+    "LibraryCollections_CountOf_PrintMaterials_ImputationFlag",
     "LibraryCollections_CountOf_Video_Downloadable",
     "LibraryCollections_CountOf_Video_Downloadable_ImputationFlag",
     "LibraryCollections_CountOf_Video_Physical",
@@ -145,7 +152,9 @@ EXPECTED_STATE_SUM_COLS = [
     "OtherElectronicInfo_CountOf_ComputerUses_ImputationFlag",
     "OtherElectronicInfo_CountOf_Computers",
     "OtherElectronicInfo_CountOf_Computers_ImputationFlag",
+    "OtherElectronicInfo_CountOf_VisitsToLibraryWebsite",
     "OtherElectronicInfo_CountOf_WiFiSessions",
+    "OtherElectronicInfo_CountOf_WiFiSessions_ImputationFlag",
     "Population_Of_LegalServiceArea",
     "Population_Of_LegalServiceArea_ImputationFlag",
     "Population_Of_LegalServiceAreas_Unduplicated",
@@ -186,11 +195,17 @@ EXPECTED_SYS_DATA_COLS = [
     "Circulation_CountOf_ChildrenMaterials",
     "Circulation_CountOf_ChildrenMaterials_ImputationFlag",
     "Circulation_CountOf_ElectronicContentUse",
+    "Circulation_CountOf_ElectronicContentUse_ImputationFlag",
     "Circulation_CountOf_ElectronicMaterials",
+    "Circulation_CountOf_ElectronicMaterials_ImputationFlag",
     "Circulation_CountOf_PhysicalMaterials",
+    "Circulation_CountOf_PhysicalMaterials_ImputationFlag",
     "Circulation_CountOf_SuccessfulRetrievalOfElectronicInfo",
+    "Circulation_CountOf_SuccessfulRetrievalOfElectronicInfo_ImputationFlag",
     "Circulation_Total_CountOf_PhysicalAndElectronicCirculation_And_ElectronicSuccessfulRetrieval",
+    "Circulation_Total_CountOf_PhysicalAndElectronicCirculation_And_ElectronicSuccessfulRetrieval_ImputationFlag",
     "Circulation_Total_Transactions",
+    "Circulation_Total_Transactions_ImputationFlag",
     "CongressionalDistrict",
     "CoreBasedStatisticalArea",
     "CountyPopulation",
@@ -227,6 +242,7 @@ EXPECTED_SYS_DATA_COLS = [
     "LibraryCollection_CountOf_ElectronicMaterials",
     "LibraryCollection_CountOf_ElectronicMaterials_ImputationFlag",
     "LibraryCollection_CountOf_PrintMaterials",
+    "LibraryCollection_CountOf_PrintMaterials_ImputationFlag",
     "LibraryCollection_CountOf_VideoMaterials_Downloadable",
     "LibraryCollection_CountOf_VideoMaterials_Downloadable_ImputationFlag",
     "LibraryCollection_CountOf_VideoMaterials_Physical",
@@ -294,7 +310,9 @@ EXPECTED_SYS_DATA_COLS = [
     "OtherElectronicInformation_CountOf_ComputersUsedByPublic_ImputationFlag",
     "OtherElectronicInformation_CountOf_UsagesOfComputers",
     "OtherElectronicInformation_CountOf_UsagesOfComputers_ImputationFlag",
+    "OtherElectronicInformation_CountOf_VisitsToLibraryWebsite",
     "OtherElectronicInformation_CountOf_WiFiUses",
+    "OtherElectronicInformation_CountOf_WiFiUses_ImputationFlag",
     "Population_Of_LegalServiceArea",
     "Population_Of_LegalServiceArea_ImputationFlag",
     "Population_Of_LegalServiceArea_Unduplicated",
@@ -1,9 +1,10 @@
 import json
 import logging
+import multiprocessing
 import os
 import shutil
 from pathlib import Path
-from typing import Any, Generator, List, cast
+from typing import Any, Dict, Generator, List, Optional, cast
 from unittest.mock import MagicMock
 
 import pytest
@@ -18,6 +19,7 @@ from tests.integration.expected_stat_columns import (
 )
 from tests.utils import MockRes, shuffled_cases
 from us_pls._download.models import DatafileType
+from us_pls._persistence.models import Between
 from us_pls._variables.models import Variables
 from us_pls.libraries import PublicLibrariesSurvey
 
@@ -29,27 +31,39 @@ def api_calls(mocker: MockerFixture) -> List[str]:
     def requests_handler(route: str, *args: Any, **kwargs: Any):
         calls.append(route)
 
+        # every resource has a fixed ETag, so conditional requests never change
+        etag = f'"{route}"'
+        headers = {"ETag": etag}
+
+        if (kwargs.get("headers") or {}).get("If-None-Match") == etag:
+            return MockRes(304, headers=headers)
+
         if (
             route
             == "https://www.imls.gov/research-evaluation/data-collection/public-libraries-survey"
         ):
             with open("../mock_api/mock_api_res.html", "r") as f:
-                return MockRes(200, f.read())
+                return MockRes(200, f.read(), headers=headers)
         else:
             if route.endswith("/sites/default/files/pls_fy2017_data_files_csv.zip"):
                 with open("../mock_api/pls_fy2017_data_files_csv.zip", "rb") as f:
-                    return MockRes(200, f.read())
+                    return MockRes(200, f.read(), headers=headers)
             elif route.endswith(
                 "/sites/default/files/fy2017_pls_data_file_documentation.pdf"
             ):
                 with open(
                     "../mock_api/fy2017_pls_data_file_documentation.pdf", "rb"
                 ) as f:
-                    return MockRes(200, f.read())
+                    return MockRes(200, f.read(), headers=headers)
             else:
                 return MockRes(400)
 
     mocker.patch.object(requests, "get", requests_handler)
+    mocker.patch.object(
+        requests.Session,
+        "get",
+        lambda _, route, *args, **kwargs: requests_handler(route, *args, **kwargs),
+    )
 
     return calls
 
@@ -168,6 +182,9 @@ def test_api_hits(
         should_overwrite_existing_cache=False,
     )
 
+    # downloads happen concurrently, so we can't count on their order
+    api_calls = sorted(api_calls)
+
     if urls_file_exists:
         if downloaded_files_exist:
             assert api_calls == []
@@ -205,9 +222,8 @@ def test_given_download_returns_400(mocker: MockerFixture):
     with open("../mock_api/mock_api_res.html", "r") as f:
         html = f.read()
 
-    mocker.patch.object(
-        requests, "get", side_effect=[MockRes(200, content=html), MockRes(400)]
-    )
+    mocker.patch.object(requests, "get", return_value=MockRes(200, content=html))
+    mocker.patch.object(requests.Session, "get", return_value=MockRes(400))
     mock_logger = MagicMock()
 
     mocker.patch.object(logging, "getLogger", return_value=mock_logger)
@@ -217,7 +233,7 @@ def test_given_download_returns_400(mocker: MockerFixture):
     except:
         pass
 
-    cast(logging.Logger, mock_logger).warning.assert_called_with(
+    cast(logging.Logger, mock_logger).warning.assert_any_call(
         "Received a non-200 status code for https://www.imls.gov/sites/default/files/fy2017_pls_data_file_documentation.pdf: 400"
     )
 
@@ -248,6 +264,71 @@ def test_stats(datafile_type: DatafileType, expected_columns: List[str]):
     assert columns == expected_columns
 
 
+@pytest.mark.integration
+def test_stats_given_columns():
+    lib = PublicLibrariesSurvey(2017)
+
+    stats = lib.get_stats(
+        DatafileType.SystemData,
+        columns=["State", lib.system_data_vars.OperatingRevenue.From],
+    )
+
+    assert stats.columns.tolist() == [
+        "State",
+        "OperatingRevenue_From_LocalGovernment",
+        "OperatingRevenue_From_LocalGovernment_ImputationFlag",
+        "OperatingRevenue_From_StateGovernment",
+        "OperatingRevenue_From_StateGovernment_ImputationFlag",
+        "OperatingRevenue_From_FederalGovernment",
+        "OperatingRevenue_From_FederalGovernment_ImputationFlag",
+        "OperatingRevenue_From_OtherSources",
+        "OperatingRevenue_From_OtherSources_ImputationFlag",
+    ]
+    assert len(stats) == 9245
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("should_use_columnar_cache", [True, False])
+def test_stats_given_where(should_use_columnar_cache: bool):
+    lib = PublicLibrariesSurvey(
+        2017, should_use_columnar_cache=should_use_columnar_cache
+    )
+
+    stats = lib.get_stats(
+        DatafileType.SystemData,
+        columns=["Name"],
+        where={
+            "State": ["PA", "NJ"],
+            "Population_Of_LegalServiceArea": Between(low=100_000),
+        },
+    )
+
+    assert stats.columns.tolist() == ["Name"]
+    assert len(stats) == 30
+    assert "FREE LIBRARY OF PHILADELPHIA" in stats["Name"].tolist()
+
+
+@pytest.mark.integration
+def test_stats_given_archive_is_kept():
+    lib = PublicLibrariesSurvey(2017, should_keep_archive=True)
+
+    assert Path("data/2017/csvs.zip").exists()
+    assert not Path("data/2017/SystemData.csv").exists()
+
+    stats = lib.get_stats(
+        DatafileType.SystemData,
+        columns=["Name"],
+        where={
+            "State": ["PA", "NJ"],
+            "Population_Of_LegalServiceArea": Between(low=100_000),
+        },
+    )
+
+    assert len(stats) == 30
+    assert "FREE LIBRARY OF PHILADELPHIA" in stats["Name"].tolist()
+    assert len(lib.get_stats(DatafileType.OutletData)) == 17_452
+
+
 @pytest.mark.integration
 @pytest.mark.parametrize(
     "datafile_type, expected_value",
@@ -276,6 +357,163 @@ def test_read_docs(
     assert capsys.readouterr().out == expected_value
 
 
+@pytest.mark.integration
+def test_revalidation_given_unchanged_resources(api_calls: List[str]):
+    _ = PublicLibrariesSurvey(2017)
+
+    last_modified = Path("data/2017/SystemData.csv").stat().st_mtime_ns
+    api_calls.clear()
+
+    _ = PublicLibrariesSurvey(2017, should_revalidate_cache=True)
+
+    # every resource gets checked...
+    assert sorted(api_calls) == [
+        "https://www.imls.gov/research-evaluation/data-collection/public-libraries-survey",
+        "https://www.imls.gov/sites/default/files/fy2017_pls_data_file_documentation.pdf",
+        "https://www.imls.gov/sites/default/files/pls_fy2017_data_files_csv.zip",
+    ]
+    # ...but since none of them changed, nothing is downloaded again
+    assert Path("data/2017/SystemData.csv").stat().st_mtime_ns == last_modified
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("cached_urls_ttl", [None, 0.0])
+def test_cached_urls_ttl(api_calls: List[str], cached_urls_ttl: Optional[float]):
+    given_urls_file_exists()
+    given_downloaded_files_exist()
+
+    _ = PublicLibrariesSurvey(2017, cached_urls_ttl=cached_urls_ttl)
+
+    if cached_urls_ttl is None:
+        assert api_calls == []
+    else:
+        # untimestamped URLs are always stale
+        assert api_calls == [
+            "https://www.imls.gov/research-evaluation/data-collection/public-libraries-survey"
+        ]
+
+        with open("data/urls.json") as f:
+            assert f.read().count("scraped_at") > 0
+
+
+@pytest.mark.integration
+def test_processes_sharing_a_cache_download_once(api_calls: List[str]):
+    results_path = Path("results")
+    results_path.mkdir()
+
+    def start_survey() -> None:
+        lib = PublicLibrariesSurvey(2017)
+
+        with open(results_path / f"{os.getpid()}.json", "w") as f:
+            json.dump(
+                dict(
+                    api_calls=api_calls,
+                    rows=len(lib.get_stats(DatafileType.SummaryData)),
+                ),
+                f,
+            )
+
+    # forked, so that every process shares our mocked API
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=start_survey) for _ in range(4)]
+
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    results: List[Dict[str, Any]] = []
+
+    for path in results_path.iterdir():
+        with open(path) as f:
+            results.append(json.load(f))
+
+    assert len(results) == 4
+    assert all(result["rows"] == 54 for result in results)
+
+    # one process did all of the work, while the rest waited and reused it
+    assert sorted(call for result in results for call in result["api_calls"]) == [
+        "https://www.imls.gov/research-evaluation/data-collection/public-libraries-survey",
+        "https://www.imls.gov/sites/default/files/fy2017_pls_data_file_documentation.pdf",
+        "https://www.imls.gov/sites/default/files/pls_fy2017_data_files_csv.zip",
+    ]
+
+
+@pytest.mark.integration
+def test_blob_store(api_calls: List[str]):
+    lib = PublicLibrariesSurvey(2017, should_use_blob_store=True)
+
+    blobs = sorted(Path("data/_blobs").glob("*/*"))
+
+    with open("data/2017/manifest.json") as f:
+        manifest = json.load(f)
+
+    # the zip's blob goes away with the zip
+    assert sorted(manifest.keys()) == [
+        "Documentation.pdf",
+        "OutletData.csv",
+        "README.txt",
+        "StateSummaryAndCharacteristicData.csv",
+        "SystemData.csv",
+    ]
+    assert sorted(blob.name for blob in blobs) == sorted(manifest.values())
+
+    # each cached file is a link to its blob
+    for resource, digest in manifest.items():
+        assert Path(f"data/2017/{resource}").samefile(
+            f"data/_blobs/{digest[:2]}/{digest}"
+        )
+
+    assert len(lib.get_stats(DatafileType.SummaryData)) == 54
+
+    # downloading everything again doesn't store anything again
+    _ = PublicLibrariesSurvey(
+        2017, should_use_blob_store=True, should_overwrite_existing_cache=True
+    )
+
+    assert sorted(Path("data/_blobs").glob("*/*")) == blobs
+    assert lib.collect_garbage() == 0
+
+    shutil.rmtree("data/2017")
+
+    assert lib.collect_garbage() == len(blobs)
+    assert list(Path("data/_blobs").glob("*/*")) == []
+
+
+@pytest.mark.integration
+def test_lazy_client_only_downloads_what_it_needs(api_calls: List[str]):
+    lib = PublicLibrariesSurvey(2017, should_download_lazily=True)
+
+    # constructing the client shouldn't touch the network,
+    # and reading variables doesn't need any datafiles
+    assert api_calls == []
+    assert lib.system_data_vars is not None
+    assert api_calls == []
+
+    stats = lib.get_stats(DatafileType.SummaryData)
+
+    assert len(stats) == 54
+    assert Path("data/2017/StateSummaryAndCharacteristicData.csv").exists()
+    assert not Path("data/2017/SystemData.csv").exists()
+    assert not Path("data/2017/OutletData.csv").exists()
+    assert not Path("data/2017/Documentation.pdf").exists()
+
+    lib.get_stats(DatafileType.SummaryData)
+    lib.get_stats(DatafileType.SystemData)
+    lib.get_stats(DatafileType.OutletData)
+    lib.read_docs(on=DatafileType.SystemData)
+
+    # the archive is only downloaded once, and removed once it's been emptied
+    assert sorted(api_calls) == [
+        "https://www.imls.gov/research-evaluation/data-collection/public-libraries-survey",
+        "https://www.imls.gov/sites/default/files/fy2017_pls_data_file_documentation.pdf",
+        "https://www.imls.gov/sites/default/files/pls_fy2017_data_files_csv.zip",
+    ]
+    assert not Path("data/2017/csvs.zip").exists()
+    for data_file in data_files:
+        assert Path(data_file).exists()
+
+
 @pytest.mark.integration
 def test_get_variables():
     lib = PublicLibrariesSurvey(2017)
@@ -1134,3 +1372,17 @@ def test_repr():
     lib = PublicLibrariesSurvey(2017)
 
     assert str(lib) == "<PublicLibrariesSurvey 2017>"
+
+
+@pytest.mark.integration
+def test_range(api_calls: List[str]):
+    panel = PublicLibrariesSurvey.range(2016, 2018, max_workers=2)
+
+    assert panel.years == [2016, 2017]
+
+    stats = panel.get_stats(DatafileType.SummaryData, columns=["Name"])
+
+    # there's only data for 2017 in the mock API
+    assert stats.columns.tolist() == ["Year", "Name"]
+    assert stats["Year"].unique().tolist() == [2017]
+    assert len(stats) == 54
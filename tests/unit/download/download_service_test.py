@@ -1,6 +1,6 @@
 import zipfile
 from pathlib import Path
-from typing import Dict
+from typing import Any, Dict
 from unittest.mock import MagicMock, call
 
 import callee
@@ -8,14 +8,17 @@ import callee.strings as strings
 import pytest
 from pytest_mock.plugin import MockerFixture
 
-from tests.service_test_fixtures import ApiServiceTestFixture
+from tests.service_test_fixtures import ServiceTestFixture
 from tests.utils import MockRes, shuffled_cases
 from us_pls._config import Config
 from us_pls._download.download_service import DownloadService
-from us_pls._download.models import DownloadType
+from us_pls._download.models import DatafileType, DownloadType
+from us_pls._download.session import LazySession
 from us_pls._logger.interface import ILoggerFactory
 from us_pls._persistence.interface import IOnDiskCache
+from us_pls._persistence.on_disk_cache import CacheException
 from us_pls._scraper.interface import IScrapingService
+from us_pls._variables.interface import IVariableRepository
 
 config = Config(2020)
 
@@ -35,12 +38,14 @@ class LightDownloadService(DownloadService):
         self,
         scraper: IScrapingService,
         cache: IOnDiskCache,
+        variable_repo: IVariableRepository,
+        session: LazySession,
         logger_factory: ILoggerFactory,
     ) -> None:
-        super().__init__(config, scraper, cache, logger_factory)
+        super().__init__(config, scraper, cache, variable_repo, session, logger_factory)
 
 
-class TestDownloadService(ApiServiceTestFixture[LightDownloadService]):
+class TestDownloadService(ServiceTestFixture[LightDownloadService]):
     @pytest.mark.parametrize("year_is_scraped", [True, False])
     def test_download_given_year_not_in_scraped_dict(self, year_is_scraped: bool):
         scraper_retval: Dict[str, Dict[str, str]] = (
@@ -65,6 +70,7 @@ class TestDownloadService(ApiServiceTestFixture[LightDownloadService]):
             mock_try_download.assert_not_called()
         else:
             self.cast_mock(self._service._logger.info).assert_not_called()
+            # these get downloaded concurrently, so order doesn't matter
             mock_try_download.assert_has_calls(
                 [
                     call(callee.Dict(), "Documentation", DownloadType.Documentation),
@@ -74,7 +80,8 @@ class TestDownloadService(ApiServiceTestFixture[LightDownloadService]):
                         "Data Element Definitions",
                         DownloadType.DataElementDefinitions,
                     ),
-                ]
+                ],
+                any_order=True,
             )
 
     @pytest.mark.parametrize(
@@ -95,7 +102,9 @@ class TestDownloadService(ApiServiceTestFixture[LightDownloadService]):
         scraped_dict: Dict[str, str] = dict(resource=resource) if has_urls else dict()
         mock_write_content = self.mocker.patch.object(self._service, "_write_content")
         mock_res_content = "banana"
-        self.requests_get_mock.return_value = MockRes(200, mock_res_content)
+        mock_session_get = self.mocker.patch.object(
+            self._service._session, "get", return_value=MockRes(200, mock_res_content)
+        )
         self.mocker.patch.object(
             self._service, "_resource_already_exists", return_value=has_resource
         )
@@ -106,23 +115,118 @@ class TestDownloadService(ApiServiceTestFixture[LightDownloadService]):
             self.cast_mock(self._service._logger.warning).assert_called_once_with(
                 "The resource `resource` does not exist for 2020"
             )
-            self.requests_get_mock.assert_not_called()
+            mock_session_get.assert_not_called()
             mock_write_content.assert_not_called()
         else:
             if has_resource:
-                self.requests_get_mock.assert_not_called()
+                mock_session_get.assert_not_called()
                 mock_write_content.assert_not_called()
             else:
                 self.cast_mock(self._service._logger.info).assert_not_called()
-                self.requests_get_mock.assert_called_once_with(
-                    strings.String() & strings.EndsWith(resource)
+                mock_session_get.assert_called_once_with(
+                    strings.String() & strings.EndsWith(resource),
+                    stream=True,
+                    headers={},
                 )
                 mock_write_content.assert_called_once_with(
                     download_type,
-                    mock_res_content,
+                    callee.Iterable(),
+                    expected_length=None,
                     should_unzip=download_type == DownloadType.CsvZip,
                 )
 
+    @pytest.mark.parametrize("status_code", [200, 304])
+    def test_try_download_resource_given_revalidation(self, status_code: int):
+        self.mocker.patch.object(self._service._config, "should_revalidate_cache", True)
+        self.mocker.patch.object(
+            self._service, "_resource_already_exists", return_value=True
+        )
+        self.mocker.patch.object(
+            self._service._cache,
+            "get_conditional_headers",
+            return_value={"If-None-Match": '"abc"'},
+        )
+        res = MockRes(status_code, b"content", headers={"ETag": '"def"'})
+        mock_session_get = self.mocker.patch.object(
+            self._service._session, "get", return_value=res
+        )
+        mock_write_content = self.mocker.patch.object(self._service, "_write_content")
+
+        self._service._try_download_resource(
+            dict(resource="route"), "resource", DownloadType.Documentation
+        )
+
+        mock_session_get.assert_called_once_with(
+            "https://www.imls.gov/route",
+            stream=True,
+            headers={"If-None-Match": '"abc"'},
+        )
+
+        if status_code == 304:
+            mock_write_content.assert_not_called()
+            self.cast_mock(self._service._cache.put_validators).assert_not_called()
+        else:
+            mock_write_content.assert_called_once()
+            self.cast_mock(self._service._cache.put_validators).assert_called_once_with(
+                DownloadType.Documentation.value, {"ETag": '"def"'}
+            )
+
+    def test_try_download_resource_given_non_200(self):
+        mock_write_content = self.mocker.patch.object(self._service, "_write_content")
+        self.mocker.patch.object(
+            self._service._session, "get", return_value=MockRes(404)
+        )
+        self.mocker.patch.object(
+            self._service, "_resource_already_exists", return_value=False
+        )
+
+        self._service._try_download_resource(
+            dict(resource="route"), "resource", DownloadType.Documentation
+        )
+
+        mock_write_content.assert_not_called()
+        self.cast_mock(self._service._logger.warning).assert_called_once_with(
+            "Received a non-200 status code for https://www.imls.gov/route: 404"
+        )
+
+    def test_try_download_resource_given_truncated_download(self):
+        self.mocker.patch.object(
+            self._service,
+            "_write_content",
+            side_effect=CacheException("Expected 10 bytes, but received 5"),
+        )
+        self.mocker.patch.object(
+            self._service._session,
+            "get",
+            return_value=MockRes(200, b"12345", headers={"Content-Length": "10"}),
+        )
+        self.mocker.patch.object(
+            self._service, "_resource_already_exists", return_value=False
+        )
+
+        self._service._try_download_resource(
+            dict(resource="route"), "resource", DownloadType.Documentation
+        )
+
+        self.cast_mock(self._service._logger.warning).assert_called_once_with(
+            "Could not download https://www.imls.gov/route: Expected 10 bytes, but received 5"
+        )
+
+    @pytest.mark.parametrize(
+        "headers,expected",
+        [
+            ({}, None),
+            ({"Content-Length": "10"}, 10),
+            ({"Content-Length": "10", "Content-Encoding": "identity"}, 10),
+            ({"Content-Length": "10", "Content-Encoding": "gzip"}, None),
+            ({"Content-Length": "banana"}, None),
+        ],
+    )
+    def test_get_expected_length(self, headers: Dict[str, str], expected: int):
+        res = MockRes(200, headers=headers)
+
+        assert self._service._get_expected_length(res) == expected  # type: ignore
+
     def test_clean_up_readme_given_no_readme(self):
         self.mocker.patch.object(self._service._cache, "get", return_value=None)
 
@@ -135,27 +239,251 @@ class TestDownloadService(ApiServiceTestFixture[LightDownloadService]):
     @pytest.mark.parametrize("should_unzip", [True, False])
     def test_write_content(self, should_unzip: bool, mock_zipfile: MagicMock):
         self.mocker.patch.object(Path, "is_dir", return_value=False)
-        self.mocker.patch.object(
-            self._service._cache.cache_path, "iterdir", return_value=[Path()]
-        )
+        # this is both the zip's path, and the path it gets extracted to
+        extraction_path = self.cast_mock(self._service._cache.cache_path) / "_extracted"
+        self.mocker.patch.object(extraction_path, "iterdir", return_value=[Path()])
+
+        chunks = [b"con", b"tent"]
 
         self._service._write_content(
-            DownloadType.Documentation, b"content", should_unzip
+            DownloadType.Documentation, chunks, 7, should_unzip=should_unzip
         )
 
-        self.cast_mock(self._service._cache.put).assert_called_once_with(
-            b"content", DownloadType.Documentation.value
+        self.cast_mock(self._service._cache.put_stream).assert_called_once_with(
+            chunks, DownloadType.Documentation.value, expected_length=7
         )
 
         if should_unzip:
             mock_zipfile.assert_called_once()
+            mock_zipfile.return_value.__enter__.return_value.extractall.assert_called_once_with(
+                extraction_path
+            )
             self.cast_mock(self._service._cache.rename).assert_called_once()
-            self.cast_mock(self._service._cache.remove).assert_called_once()
+            # once for the extracted files, and once for the zip
+            assert self.cast_mock(self._service._cache.remove).call_count == 2
         else:
             mock_zipfile.assert_not_called()
             self.cast_mock(self._service._cache.rename).assert_not_called()
             self.cast_mock(self._service._cache.remove).assert_not_called()
 
+    def test_write_content_given_archive_is_kept(self, mock_zipfile: MagicMock):
+        self.mocker.patch.object(self._service._config, "should_keep_archive", True)
+        zip_path = self.cast_mock(self._service._cache.cache_path) / "csvs.zip"
+        mock_zipfile.return_value.__enter__.return_value.infolist.return_value = [
+            zipfile.ZipInfo("PLS_FY17/"),
+            zipfile.ZipInfo("PLS_FY17/PLS_FY17_AE_pud17i.csv"),
+            zipfile.ZipInfo("PLS_FY17/PLS_FY17_Outlet_pud17i.csv"),
+            zipfile.ZipInfo("PLS_FY17/PLS_FY17_State_pud17i.csv"),
+            zipfile.ZipInfo("PLS_FY17/README FY17 PLS PUD.txt"),
+        ]
+        mock_zipfile.return_value.__enter__.return_value.read.return_value = b"readme"
+
+        self._service._write_content(DownloadType.CsvZip, [], should_unzip=True)
+
+        mock_zipfile.return_value.__enter__.return_value.extractall.assert_not_called()
+        self.cast_mock(self._service._cache.remove).assert_not_called()
+        self.cast_mock(self._service._cache.convert_to_columnar).assert_not_called()
+        self.cast_mock(self._service._cache.put).assert_called_once_with(
+            b"readme", "README.txt"
+        )
+        self.cast_mock(self._service._cache.put_archive_index).assert_called_once_with(
+            zip_path.name,
+            {
+                "SystemData.csv": "PLS_FY17/PLS_FY17_AE_pud17i.csv",
+                "OutletData.csv": "PLS_FY17/PLS_FY17_Outlet_pud17i.csv",
+                "StateSummaryAndCharacteristicData.csv": "PLS_FY17/PLS_FY17_State_pud17i.csv",
+            },
+        )
+
+    @pytest.mark.parametrize(
+        *shuffled_cases(should_download_lazily=[True, False], zip_exists=[True, False])
+    )
+    def test_resource_already_exists_given_archive(
+        self, should_download_lazily: bool, zip_exists: bool
+    ):
+        self.mocker.patch.object(
+            self._service._config, "should_download_lazily", should_download_lazily
+        )
+        self.mocker.patch.object(
+            self._service._cache,
+            "exists",
+            side_effect=lambda name: zip_exists and name == DownloadType.CsvZip.value,
+        )
+
+        res = self._service._resource_already_exists(DownloadType.CsvZip)
+
+        assert res == (should_download_lazily and zip_exists)
+
+    @pytest.mark.parametrize("is_extracted", [True, False])
+    def test_download_datafile(self, is_extracted: bool):
+        mock_download_from_archive = self.mocker.patch.object(
+            self._service, "_download_from_archive", return_value=is_extracted
+        )
+
+        self._service.download_datafile(DatafileType.OutletData)
+
+        mock_download_from_archive.assert_called_once_with("OutletData.csv")
+
+        if is_extracted:
+            self.cast_mock(
+                self._service._cache.convert_to_columnar
+            ).assert_called_once_with("OutletData.csv", dtypes=callee.Any())
+        else:
+            self.cast_mock(self._service._cache.convert_to_columnar).assert_not_called()
+
+    def test_download_documentation(self):
+        self.mocker.patch.object(
+            self._service._scraper,
+            "scrape_files",
+            return_value={str(config.year): dict(Documentation="route")},
+        )
+        mock_try_download = self.mocker.patch.object(
+            self._service, "_try_download_resource"
+        )
+        mock_download_from_archive = self.mocker.patch.object(
+            self._service, "_download_from_archive", return_value=True
+        )
+        mock_clean_up_readme = self.mocker.patch.object(
+            self._service, "_clean_up_readme"
+        )
+
+        self._service.download_documentation()
+
+        # the archive is only downloaded to get at the readme
+        mock_try_download.assert_has_calls(
+            [
+                call(callee.Dict(), "Documentation", DownloadType.Documentation),
+                call(
+                    callee.Dict(),
+                    "Data Element Definitions",
+                    DownloadType.DataElementDefinitions,
+                ),
+            ]
+        )
+        assert mock_try_download.call_count == 2
+        mock_download_from_archive.assert_called_once_with("README.txt")
+        mock_clean_up_readme.assert_called_once()
+
+    @pytest.mark.parametrize(
+        *shuffled_cases(already_exists=[True, False], download_succeeds=[True, False])
+    )
+    def test_download_from_archive(self, already_exists: bool, download_succeeds: bool):
+        downloaded: Dict[str, bool] = dict(zip=False, member=already_exists)
+        self.mocker.patch.object(
+            self._service._scraper,
+            "scrape_files",
+            return_value={str(config.year): dict(CSV="route")},
+        )
+        self.mocker.patch.object(
+            self._service._cache,
+            "exists",
+            side_effect=lambda name: downloaded["zip"]
+            if name == DownloadType.CsvZip.value
+            else downloaded["member"],
+        )
+        mock_try_download = self.mocker.patch.object(
+            self._service,
+            "_download_resource",
+            side_effect=lambda *_: downloaded.update(zip=download_succeeds),
+        )
+        mock_extract_member = self.mocker.patch.object(
+            self._service,
+            "_extract_member",
+            side_effect=lambda _: downloaded.update(member=True),
+        )
+        self.mocker.patch.object(self._service, "_remove_archive_if_exhausted")
+
+        res = self._service._download_from_archive("OutletData.csv")
+
+        if already_exists:
+            mock_try_download.assert_not_called()
+            mock_extract_member.assert_not_called()
+            assert res == False
+        else:
+            mock_try_download.assert_called_once_with(
+                callee.Dict(), "CSV", DownloadType.CsvZip
+            )
+            self.cast_mock(self._service._cache.lock).assert_called_once_with(
+                DownloadType.CsvZip.value
+            )
+
+            if download_succeeds:
+                mock_extract_member.assert_called_once_with("OutletData.csv")
+                assert res == True
+            else:
+                mock_extract_member.assert_not_called()
+                assert res == False
+
+    def test_download_from_archive_given_extracted_while_waiting(self):
+        downloaded: Dict[str, bool] = dict(member=False)
+        self.mocker.patch.object(
+            self._service._scraper,
+            "scrape_files",
+            return_value={str(config.year): dict(CSV="route")},
+        )
+        self.mocker.patch.object(
+            self._service._cache,
+            "exists",
+            side_effect=lambda name: downloaded["member"],
+        )
+        # another process extracts the member while we wait for the lock
+        self.cast_mock(
+            self._service._cache.lock
+        ).return_value.__enter__.side_effect = lambda: downloaded.update(member=True)
+        mock_download = self.mocker.patch.object(self._service, "_download_resource")
+
+        assert self._service._download_from_archive("OutletData.csv") == False
+        mock_download.assert_not_called()
+
+    def test_try_download_resource_holds_lock(self):
+        mock_lock = self.cast_mock(self._service._cache.lock)
+
+        def assert_locked(*_: Any) -> None:
+            mock_lock.return_value.__enter__.assert_called_once()
+            mock_lock.return_value.__exit__.assert_not_called()
+
+        mock_download = self.mocker.patch.object(
+            self._service, "_download_resource", side_effect=assert_locked
+        )
+
+        self._service._try_download_resource(
+            dict(CSV="route"), "CSV", DownloadType.CsvZip
+        )
+
+        mock_lock.assert_called_once_with(DownloadType.CsvZip.value)
+        mock_download.assert_called_once_with(
+            dict(CSV="route"), "CSV", DownloadType.CsvZip
+        )
+        mock_lock.return_value.__exit__.assert_called_once()
+
+    def test_extract_member(self, mock_zipfile: MagicMock):
+        zip_ref = mock_zipfile.return_value.__enter__.return_value
+        zip_ref.infolist.return_value = [
+            zipfile.ZipInfo("PLS_FY17/PLS_FY17_AE_pud17i.csv"),
+            zipfile.ZipInfo("PLS_FY17/PLS_FY17_Outlet_pud17i.csv"),
+        ]
+        zip_ref.infolist.return_value[1].file_size = 7
+
+        self._service._extract_member("OutletData.csv")
+
+        zip_ref.open.assert_called_once_with(zip_ref.infolist.return_value[1])
+        self.cast_mock(self._service._cache.put_stream).assert_called_once_with(
+            callee.Iterable(), "OutletData.csv", expected_length=7
+        )
+
+    def test_extract_member_given_missing_member(self, mock_zipfile: MagicMock):
+        zip_ref = mock_zipfile.return_value.__enter__.return_value
+        zip_ref.infolist.return_value = [
+            zipfile.ZipInfo("PLS_FY17/PLS_FY17_AE_pud17i.csv"),
+        ]
+
+        self._service._extract_member("OutletData.csv")
+
+        self.cast_mock(self._service._cache.put_stream).assert_not_called()
+        self.cast_mock(self._service._logger.warning).assert_called_once_with(
+            callee.StartsWith("OutletData.csv does not exist in")
+        )
+
     def test_resource_already_exists_given_faulty_resource(self):
         res = self._service._resource_already_exists("banana")  # type: ignore
 
@@ -0,0 +1,19 @@
+import requests
+from pytest_mock.plugin import MockerFixture
+
+from us_pls._download.session import LazySession
+
+
+def test_session_is_created_on_first_use(mocker: MockerFixture):
+    mock_session = mocker.patch.object(requests, "Session")
+
+    session = LazySession()
+
+    mock_session.assert_not_called()
+
+    session.get("https://www.imls.gov", stream=True)
+    session.get("https://www.imls.gov")
+
+    mock_session.assert_called_once()
+    assert mock_session.return_value.get.call_count == 2
+    mock_session.return_value.get.assert_called_with("https://www.imls.gov")
@@ -0,0 +1,79 @@
+import logging
+from logging.handlers import QueueHandler
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from pytest_mock.plugin import MockerFixture
+
+from us_pls._logger import configure_logger as configure_logger_module
+from us_pls._logger.configure_logger import configure_logger
+
+
+@pytest.fixture(autouse=True)
+def fresh_logging_setup(mocker: MockerFixture) -> Generator[None, None, None]:
+    mocker.patch.object(logging.root, "handlers", [])
+    mocker.patch.object(logging.root, "level", logging.root.level)
+    mocker.patch.object(configure_logger_module, "_queue_handler", None)
+    mocker.patch.object(configure_logger_module, "_listener", None)
+    mocker.patch.object(configure_logger_module, "_log_files", set())
+    mocker.patch("atexit.register")
+
+    yield
+
+    listener = configure_logger_module._listener
+
+    if listener is not None and listener._thread is not None:  # type: ignore
+        listener.stop()
+
+
+def given_no_root_handlers() -> None:
+    # pytest adds its own handlers to the root logger while a test runs
+    logging.root.handlers.clear()
+
+
+def test_configure_logger_is_idempotent(tmp_path: Path):
+    given_no_root_handlers()
+
+    configure_logger(str(tmp_path / "pls.log"), 2017)
+    configure_logger(str(tmp_path / "pls.log"), 2018)
+
+    assert len(logging.root.handlers) == 1
+    assert isinstance(logging.root.handlers[0], QueueHandler)
+
+    listener = configure_logger_module._listener
+
+    assert listener is not None
+    assert len(listener.handlers) == 2
+
+
+def test_configure_logger_given_new_log_file(tmp_path: Path):
+    given_no_root_handlers()
+
+    configure_logger(str(tmp_path / "pls.log"), 2017)
+    configure_logger(str(tmp_path / "other.log"), 2018)
+
+    listener = configure_logger_module._listener
+
+    assert len(logging.root.handlers) == 1
+    assert listener is not None
+    assert len(listener.handlers) == 3
+
+
+def test_records_are_written_by_the_listener(tmp_path: Path):
+    log_file = tmp_path / "pls.log"
+    given_no_root_handlers()
+
+    configure_logger(str(log_file), 2017)
+
+    logging.getLogger("us_pls.banana").debug("phone %s", "home")
+    logging.getLogger("elsewhere").debug("not for us")
+
+    # stopping the listener flushes the queue
+    configure_logger_module._stop_listener()
+
+    lines = log_file.read_text().splitlines()
+
+    assert len(lines) == 1
+    assert lines[0].startswith("[PLS_2017 DEBUG]")
+    assert lines[0].endswith("phone home")
@@ -0,0 +1,97 @@
+from unittest.mock import MagicMock
+
+import pandas
+import pytest
+
+from us_pls._config import Config
+from us_pls._persistence.in_memory_cache import InMemoryCache
+
+df = pandas.DataFrame([dict(a=1, b=2), dict(a=3, b=4)])
+df_size = int(df.memory_usage(deep=True).sum())
+
+
+def get_cache(config: Config = Config(2019)) -> InMemoryCache:
+    return InMemoryCache(config=config, logger_factory=MagicMock())
+
+
+def test_get_miss():
+    assert get_cache().get("banana") is None
+
+
+def test_put_and_get():
+    cache = get_cache()
+
+    cache.put("key", df)
+
+    res = cache.get("key")
+
+    assert res is not None
+    assert res.to_dict("records") == df.to_dict("records")
+    assert cache.size_in_bytes == df_size
+
+
+def test_get_returns_copy():
+    cache = get_cache()
+    cache.put("key", df.copy())
+
+    res = cache.get("key")
+    assert res is not None
+    res["a"] = 100
+
+    res_again = cache.get("key")
+    assert res_again is not None
+    assert res_again["a"].tolist() == [1, 3]
+
+
+def test_put_given_memoization_disabled():
+    cache = get_cache(Config(2019, should_memoize_stats=False))
+
+    cache.put("key", df)
+
+    assert cache.get("key") is None
+
+
+def test_put_given_entry_larger_than_budget():
+    cache = get_cache(Config(2019, memoized_stats_max_bytes=df_size - 1))
+
+    cache.put("key", df)
+
+    assert cache.get("key") is None
+    assert cache.size_in_bytes == 0
+
+
+@pytest.mark.parametrize("should_touch_first_key", [True, False])
+def test_put_evicts_least_recently_used(should_touch_first_key: bool):
+    cache = get_cache(Config(2019, memoized_stats_max_bytes=df_size * 2))
+
+    cache.put("first", df)
+    cache.put("second", df)
+
+    if should_touch_first_key:
+        cache.get("first")
+
+    cache.put("third", df)
+
+    assert (cache.get("first") is not None) == should_touch_first_key
+    assert (cache.get("second") is not None) != should_touch_first_key
+    assert cache.get("third") is not None
+    assert cache.size_in_bytes == df_size * 2
+
+
+def test_put_same_key_replaces_entry():
+    cache = get_cache()
+
+    cache.put("key", df)
+    cache.put("key", df)
+
+    assert cache.size_in_bytes == df_size
+
+
+def test_clear():
+    cache = get_cache()
+    cache.put("key", df)
+
+    cache.clear()
+
+    assert cache.get("key") is None
+    assert cache.size_in_bytes == 0
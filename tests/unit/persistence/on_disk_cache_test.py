@@ -1,13 +1,20 @@
+import hashlib
 import json
 import os
 import shutil
+import tempfile
+import zipfile
 from pathlib import Path
 from unittest.mock import MagicMock
 
+import callee
+import pandas
 import pytest
 from pytest_mock.plugin import MockerFixture
 
 from us_pls._config import Config
+from us_pls._persistence import on_disk_cache
+from us_pls._persistence.models import Between
 from us_pls._persistence.on_disk_cache import CacheException, OnDiskCache
 
 default_config = Config(2019)
@@ -58,6 +65,36 @@ def mock_path_is_dir(mocker: MockerFixture) -> MagicMock:
     return mocker.patch.object(Path, "is_dir")
 
 
+@pytest.fixture(autouse=True)
+def mock_path_stat(mocker: MockerFixture) -> MagicMock:
+    return mocker.patch.object(Path, "stat")
+
+
+@pytest.fixture(autouse=True)
+def mock_mkstemp(mocker: MockerFixture) -> MagicMock:
+    return mocker.patch.object(tempfile, "mkstemp", return_value=(3, "temp.part"))
+
+
+@pytest.fixture(autouse=True)
+def mock_fdopen(mocker: MockerFixture) -> MagicMock:
+    return mocker.patch.object(os, "fdopen")
+
+
+@pytest.fixture(autouse=True)
+def mock_os_replace(mocker: MockerFixture) -> MagicMock:
+    return mocker.patch.object(os, "replace")
+
+
+@pytest.fixture
+def mock_read_parquet(mocker: MockerFixture) -> MagicMock:
+    return mocker.patch.object(pandas, "read_parquet")
+
+
+@pytest.fixture
+def given_columnar_engine(mocker: MockerFixture):
+    mocker.patch.object(on_disk_cache, "IS_COLUMNAR_ENGINE_AVAILABLE", True)
+
+
 def get_cache(config: Config = default_config) -> OnDiskCache:
     return OnDiskCache(config=config, logger_factory=MagicMock())
 
@@ -89,22 +126,192 @@ def test_exists(path_exists: bool, mock_path_exists: MagicMock):
     assert get_cache().exists("banana") == path_exists
 
 
+@pytest.mark.parametrize("is_archived", [True, False])
+def test_exists_given_archive(
+    mocker: MockerFixture, mock_json_load: MagicMock, is_archived: bool
+):
+    mocker.patch.object(
+        Path, "exists", new=lambda path: path.name == "archive_index.json"
+    )
+    mock_json_load.return_value = (
+        {"banana": dict(archive="csvs.zip", member="dir/banana.csv")}
+        if is_archived
+        else {}
+    )
+
+    cache = get_cache(Config(2019, should_keep_archive=True))
+
+    assert cache.exists("banana") == is_archived
+
+
+def test_exists_given_archive_mode_disabled(
+    mocker: MockerFixture, mock_json_load: MagicMock
+):
+    mocker.patch.object(
+        Path, "exists", new=lambda path: path.name == "archive_index.json"
+    )
+    mock_json_load.return_value = {
+        "banana": dict(archive="csvs.zip", member="dir/banana.csv")
+    }
+
+    assert not get_cache().exists("banana")
+
+
 @pytest.mark.parametrize("resource_path", ["data/2019/banana", "banana"])
 def test_get_full_path_name(resource_path: str):
     assert get_cache()._get_full_path(Path(resource_path)) == Path("data/2019/banana")
 
 
-def test_put_bytes(mock_open: MagicMock):
+def test_put_bytes(
+    mock_mkstemp: MagicMock, mock_fdopen: MagicMock, mock_os_replace: MagicMock
+):
     get_cache().put(bytes([1, 2, 3]), "somwhere")
 
-    mock_open.assert_called_once_with(Path("data/2019/somwhere"), "wb")
+    # it's written next to its destination, and then moved into place
+    mock_mkstemp.assert_called_once_with(
+        prefix=".somwhere.", suffix=".part", dir=Path("data/2019")
+    )
+    mock_fdopen.assert_called_once_with(3, "wb")
+    mock_fdopen.return_value.__enter__.return_value.write.assert_called_once_with(
+        bytes([1, 2, 3])
+    )
+    mock_os_replace.assert_called_once_with("temp.part", Path("data/2019/somwhere"))
+
+
+def test_put_given_failed_write(
+    mocker: MockerFixture,
+    mock_fdopen: MagicMock,
+    mock_os_replace: MagicMock,
+    mock_os_remove: MagicMock,
+):
+    mocker.patch.object(os.path, "exists", return_value=True)
+    mock_fdopen.return_value.__enter__.return_value.write.side_effect = OSError(
+        "disk full"
+    )
+
+    with pytest.raises(OSError, match="disk full"):
+        get_cache().put(bytes([1, 2, 3]), "somwhere")
+
+    # the destination is never left half-written
+    mock_os_replace.assert_not_called()
+    mock_os_remove.assert_called_once_with("temp.part")
+
+
+@pytest.mark.parametrize("is_locked_elsewhere", [True, False])
+def test_lock(mocker: MockerFixture, mock_open: MagicMock, is_locked_elsewhere: bool):
+    import fcntl
+
+    mock_flock = mocker.patch.object(
+        fcntl,
+        "flock",
+        side_effect=[BlockingIOError() if is_locked_elsewhere else None, None, None],
+    )
+    mock_open.return_value.__enter__.return_value.fileno.return_value = 5
+
+    with get_cache().lock("csvs.zip"):
+        mock_open.assert_called_once_with(Path("data/2019/.csvs.zip.lock"), "a")
+        assert mock_flock.call_args_list[-1] == mocker.call(
+            5, fcntl.LOCK_EX if is_locked_elsewhere else fcntl.LOCK_EX | fcntl.LOCK_NB
+        )
+
+    assert mock_flock.call_args_list[-1] == mocker.call(5, fcntl.LOCK_UN)
+
+
+def test_lock_given_no_file_locking(mocker: MockerFixture, mock_open: MagicMock):
+    mocker.patch.object(on_disk_cache, "IS_FILE_LOCKING_AVAILABLE", False)
+
+    with get_cache().lock("csvs.zip"):
+        pass
+
+    mock_open.assert_not_called()
+
+
+@pytest.mark.parametrize("expected_length", [None, 7])
+def test_put_stream(
+    mock_fdopen: MagicMock, mock_os_replace: MagicMock, expected_length: int
+):
+    cache = get_cache()
+
+    cache.put_stream([b"con", b"tent"], "resource", expected_length=expected_length)
+
+    mock_file = mock_fdopen.return_value.__enter__.return_value
+    assert mock_file.write.call_count == 2
+    mock_os_replace.assert_called_once_with("temp.part", Path("data/2019/resource"))
+
+
+def test_put_stream_given_truncated_download(
+    mocker: MockerFixture, mock_os_remove: MagicMock, mock_os_replace: MagicMock
+):
+    mocker.patch.object(os.path, "exists", return_value=True)
+
+    cache = get_cache()
+
+    with pytest.raises(
+        CacheException,
+        match="Expected 10 bytes for data/2019/resource, but received 7",
+    ):
+        cache.put_stream([b"con", b"tent"], "resource", expected_length=10)
 
+    mock_os_replace.assert_not_called()
+    mock_os_remove.assert_called_once_with("temp.part")
 
-def test_put_json(mock_open: MagicMock, mock_json_dump: MagicMock):
+
+def test_get_conditional_headers(
+    mock_path_exists: MagicMock, mock_json_load: MagicMock
+):
+    mock_path_exists.return_value = True
+    mock_json_load.return_value = {
+        "ETag": '"abc"',
+        "Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT",
+        "banana": "phone",
+    }
+
+    assert get_cache().get_conditional_headers("csvs.zip") == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT",
+    }
+
+
+def test_get_conditional_headers_given_no_validators(mock_path_exists: MagicMock):
+    mock_path_exists.return_value = False
+
+    assert get_cache().get_conditional_headers("csvs.zip") == {}
+
+
+def test_put_validators(mock_os_replace: MagicMock, mock_json_dump: MagicMock):
+    get_cache().put_validators("csvs.zip", {"ETag": '"abc"', "Content-Length": "10"})
+
+    mock_os_replace.assert_called_once_with(
+        "temp.part", Path("data/2019/csvs.zip.validators.json")
+    )
+    mock_json_dump.assert_called_once_with({"ETag": '"abc"'}, callee.Any())
+
+
+def test_put_validators_given_none_sent(
+    mock_path_exists: MagicMock,
+    mock_path_is_dir: MagicMock,
+    mock_os_remove: MagicMock,
+    mock_json_dump: MagicMock,
+):
+    mock_path_exists.return_value = True
+    mock_path_is_dir.return_value = False
+
+    get_cache().put_validators("csvs.zip", {"Content-Length": "10"})
+
+    mock_json_dump.assert_not_called()
+    mock_os_remove.assert_called_once_with(Path("data/2019/csvs.zip.validators.json"))
+
+
+def test_put_json(
+    mock_fdopen: MagicMock, mock_os_replace: MagicMock, mock_json_dump: MagicMock
+):
     get_cache().put(dict(some="thing"), "somewhere")
 
-    mock_open.assert_called_once_with(Path("data/2019/somewhere"), "w")
-    mock_json_dump.assert_called_once()
+    mock_fdopen.assert_called_once_with(3, "w")
+    mock_json_dump.assert_called_once_with(
+        dict(some="thing"), mock_fdopen.return_value.__enter__.return_value
+    )
+    mock_os_replace.assert_called_once_with("temp.part", Path("data/2019/somewhere"))
 
 
 def test_get_miss(mock_path_exists: MagicMock):
@@ -151,13 +358,153 @@ def test_get_df(
 ):
     mock_path_exists.return_value = True
 
-    get_cache().get("something", "df")
+    get_cache(Config(2019, should_use_columnar_cache=False)).get("something", "df")
 
     mock_read_csv.assert_called_once_with(Path("data/2019/something"))
     mock_json_load.assert_not_called()
     mock_open.assert_not_called()
 
 
+def test_get_df_given_archive(
+    mocker: MockerFixture, mock_read_csv: MagicMock, mock_json_load: MagicMock
+):
+    mocker.patch.object(
+        Path, "exists", new=lambda path: path.name == "archive_index.json"
+    )
+    mock_json_load.return_value = {
+        "SystemData.csv": dict(archive="csvs.zip", member="dir/PLS_AE.csv")
+    }
+    mock_zipfile = mocker.patch.object(zipfile, "ZipFile")
+    mock_zip_ref = mock_zipfile.return_value.__enter__.return_value
+    mock_read_csv.return_value = pandas.DataFrame([dict(count=1)])
+
+    get_cache(Config(2019, should_keep_archive=True)).get("SystemData.csv", "df")
+
+    mock_zipfile.assert_called_once_with(Path("data/2019/csvs.zip"), "r")
+    mock_zip_ref.open.assert_called_once_with("dir/PLS_AE.csv")
+    mock_read_csv.assert_called_once_with(
+        mock_zip_ref.open.return_value.__enter__.return_value
+    )
+
+
+def test_put_archive_index(mock_json_dump: MagicMock):
+    get_cache().put_archive_index("csvs.zip", {"SystemData.csv": "dir/PLS_AE.csv"})
+
+    mock_json_dump.assert_called_once_with(
+        {"SystemData.csv": dict(archive="csvs.zip", member="dir/PLS_AE.csv")},
+        callee.Any(),
+    )
+
+
+def test_get_df_given_non_utf8_csv(
+    mock_path_exists: MagicMock,
+    mock_read_csv: MagicMock,
+):
+    mock_path_exists.return_value = True
+    mock_read_csv.side_effect = [
+        UnicodeDecodeError("utf-8", b"", 0, 1, "invalid start byte"),
+        pandas.DataFrame(),
+    ]
+
+    get_cache(Config(2019, should_use_columnar_cache=False)).get("something", "df")
+
+    assert mock_read_csv.call_args_list[1].kwargs == dict(encoding="cp1252")
+
+
+def test_get_df_given_columns(
+    mock_path_exists: MagicMock,
+    mock_read_csv: MagicMock,
+):
+    mock_path_exists.return_value = True
+    mock_read_csv.return_value = pandas.DataFrame([dict(a=1, b=2, c=3)])
+
+    res = get_cache(Config(2019, should_use_columnar_cache=False)).get(
+        "something", "df", columns=["c", "a", "banana"]
+    )
+
+    assert res is not None
+    assert res.columns.tolist() == ["c", "a"]
+    usecols = mock_read_csv.call_args.kwargs["usecols"]
+    assert usecols("a") and not usecols("b")
+
+
+@pytest.mark.usefixtures("given_columnar_engine")
+def test_get_df_given_fresh_columnar_file(
+    mock_path_exists: MagicMock,
+    mock_path_stat: MagicMock,
+    mock_read_csv: MagicMock,
+    mock_read_parquet: MagicMock,
+):
+    mock_path_exists.return_value = True
+    mock_path_stat.return_value.st_mtime = 1
+
+    get_cache().get("something.csv", "df")
+
+    mock_read_parquet.assert_called_once_with(Path("data/2019/something.parquet"))
+    mock_read_csv.assert_not_called()
+
+
+@pytest.mark.usefixtures("given_columnar_engine")
+@pytest.mark.parametrize("columnar_file_exists", [True, False])
+def test_get_df_given_missing_or_stale_columnar_file(
+    columnar_file_exists: bool,
+    mocker: MockerFixture,
+    mock_path_stat: MagicMock,
+    mock_read_csv: MagicMock,
+    mock_read_parquet: MagicMock,
+    mock_fdopen: MagicMock,
+    mock_os_replace: MagicMock,
+):
+    mocker.patch.object(
+        Path,
+        "exists",
+        new=lambda path: path.suffix != ".parquet" or columnar_file_exists,
+    )
+    # the columnar file is older than the CSV
+    mock_path_stat.side_effect = [MagicMock(st_mtime=1), MagicMock(st_mtime=2)]
+    mock_to_parquet = mocker.patch.object(pandas.DataFrame, "to_parquet")
+    mock_read_csv.return_value = pandas.DataFrame()
+
+    get_cache().get("something.csv", "df")
+
+    mock_read_parquet.assert_not_called()
+    mock_read_csv.assert_called_once_with(Path("data/2019/something.csv"))
+    mock_to_parquet.assert_called_once_with(
+        mock_fdopen.return_value.__enter__.return_value,
+        index=False,
+        row_group_size=4096,
+    )
+    mock_os_replace.assert_called_once_with(
+        "temp.part", Path("data/2019/something.parquet")
+    )
+
+
+@pytest.mark.usefixtures("given_columnar_engine")
+@pytest.mark.parametrize("source_exists", [True, False])
+def test_convert_to_columnar(
+    source_exists: bool,
+    mocker: MockerFixture,
+    mock_path_exists: MagicMock,
+    mock_read_csv: MagicMock,
+    mock_fdopen: MagicMock,
+):
+    mock_path_exists.return_value = source_exists
+    mock_to_parquet = mocker.patch.object(pandas.DataFrame, "to_parquet")
+    mock_read_csv.return_value = pandas.DataFrame()
+
+    get_cache().convert_to_columnar("something.csv")
+
+    if source_exists:
+        mock_to_parquet.assert_called_once_with(
+            mock_fdopen.return_value.__enter__.return_value,
+            index=False,
+            row_group_size=4096,
+        )
+    else:
+        mock_read_csv.assert_not_called()
+        mock_to_parquet.assert_not_called()
+
+
 def test_get_bad_type(mock_path_exists: MagicMock):
     mock_path_exists.return_value = True
 
@@ -191,3 +538,173 @@ def test_rename(mock_os_rename: MagicMock):
     get_cache().rename(Path("a"), Path("b"))
 
     mock_os_rename.assert_called_once_with(Path("data/2019/a"), Path("data/2019/b"))
+
+
+blob_store_config = Config(2019, should_use_blob_store=True)
+
+
+def test_put_stream_given_blob_store(mocker: MockerFixture):
+    cache = get_cache(blob_store_config)
+    mock_put_blob = mocker.patch.object(cache, "_put_blob")
+
+    cache.put_stream([b"con", b"tent"], "resource")
+
+    mock_put_blob.assert_called_once_with(
+        Path("data/2019/resource"), hashlib.sha256(b"content").hexdigest()
+    )
+
+
+def test_rename_given_blob_store(mocker: MockerFixture, mock_os_rename: MagicMock):
+    mocker.patch.object(Path, "is_file", return_value=True)
+    cache = get_cache(blob_store_config)
+    mocker.patch.object(cache, "_hash_file", return_value="abc")
+    mock_put_blob = mocker.patch.object(cache, "_put_blob")
+
+    cache.rename(Path("a"), Path("b"))
+
+    mock_os_rename.assert_called_once_with(Path("data/2019/a"), Path("data/2019/b"))
+    mock_put_blob.assert_called_once_with(Path("data/2019/b"), "abc")
+
+
+def test_remove_given_blob_store(
+    mocker: MockerFixture,
+    mock_path_exists: MagicMock,
+    mock_path_is_dir: MagicMock,
+    mock_path_stat: MagicMock,
+    mock_json_load: MagicMock,
+    mock_json_dump: MagicMock,
+    mock_os_remove: MagicMock,
+):
+    mocker.patch.object(on_disk_cache, "IS_FILE_LOCKING_AVAILABLE", False)
+    mock_path_exists.return_value = True
+    mock_path_is_dir.return_value = False
+    mock_path_stat.return_value.st_nlink = 1
+    mock_json_load.return_value = {"csvs.zip": "abc", "SystemData.csv": "def"}
+
+    get_cache(blob_store_config).remove(Path("csvs.zip"))
+
+    mock_json_dump.assert_called_once_with({"SystemData.csv": "def"}, callee.Any())
+    # nothing else links to the zip's blob, so it goes too
+    assert mock_os_remove.call_args_list == [
+        mocker.call(Path("data/2019/csvs.zip")),
+        mocker.call(Path("data/_blobs/ab/abc")),
+    ]
+
+
+@pytest.mark.parametrize("chunked", [True, False])
+def test_get_df_given_filters(
+    chunked: bool,
+    mocker: MockerFixture,
+    mock_path_exists: MagicMock,
+    mock_read_csv: MagicMock,
+):
+    mock_path_exists.return_value = True
+    df = pandas.DataFrame(
+        [
+            dict(state="PA", pop=10, name="a"),
+            dict(state="NJ", pop=20, name="b"),
+            dict(state="PA", pop=30, name="c"),
+            dict(state="NY", pop=40, name="d"),
+        ]
+    )
+    # with chunked reads, we get back an iterator of frames
+    mock_read_csv.return_value = iter([df[:2], df[2:]]) if chunked else df
+
+    if not chunked:
+        mocker.patch.object(on_disk_cache, "IS_COLUMNAR_ENGINE_AVAILABLE", True)
+        mocker.patch.object(pandas.DataFrame, "to_parquet")
+        mocker.patch.object(Path, "exists", new=lambda path: path.suffix != ".parquet")
+
+    res = get_cache(Config(2019, should_use_columnar_cache=not chunked)).get(
+        "something.csv",
+        "df",
+        columns=["name"],
+        filters=dict(state=("PA", "NJ"), pop=Between(low=15)),
+    )
+
+    assert res is not None
+    assert res.to_dict("records") == [dict(name="b"), dict(name="c")]
+
+    if chunked:
+        usecols = mock_read_csv.call_args.kwargs["usecols"]
+        assert usecols("state") and usecols("pop") and usecols("name")
+        assert mock_read_csv.call_args.kwargs["chunksize"] == 10_000
+
+
+def test_get_df_given_filter_on_missing_column(
+    mock_path_exists: MagicMock,
+    mock_read_csv: MagicMock,
+):
+    mock_path_exists.return_value = True
+    mock_read_csv.return_value = iter([pandas.DataFrame([dict(a=1)])])
+
+    with pytest.raises(
+        CacheException,
+        match=r"Cannot filter on columns that do not exist in this datafile: \['banana'\]",
+    ):
+        get_cache(Config(2019, should_use_columnar_cache=False)).get(
+            "something", "df", filters=dict(banana=(1,))
+        )
+
+
+@pytest.mark.usefixtures("given_columnar_engine")
+def test_get_df_given_filters_and_fresh_columnar_file(
+    mocker: MockerFixture,
+    mock_path_exists: MagicMock,
+    mock_path_stat: MagicMock,
+    mock_read_parquet: MagicMock,
+):
+    mock_path_exists.return_value = True
+    mock_path_stat.return_value.st_mtime = 1
+    mock_schema = mocker.patch("pyarrow.parquet.read_schema")
+    mock_schema.return_value.names = ["state", "pop", "name"]
+
+    get_cache().get(
+        "something.csv",
+        "df",
+        columns=["name"],
+        filters=dict(state=("PA", "NJ"), pop=Between(low=15, high=35)),
+    )
+
+    mock_read_parquet.assert_called_once_with(
+        Path("data/2019/something.parquet"),
+        columns=["name"],
+        filters=[
+            ("state", "in", ["PA", "NJ"]),
+            ("pop", ">=", 15),
+            ("pop", "<=", 35),
+        ],
+    )
+
+
+@pytest.mark.parametrize("should_use_compact_dtypes", [True, False])
+def test_get_df_given_dtypes(
+    should_use_compact_dtypes: bool,
+    mock_path_exists: MagicMock,
+    mock_read_csv: MagicMock,
+):
+    mock_path_exists.return_value = True
+    mock_read_csv.return_value = iter(
+        [
+            pandas.DataFrame([dict(flag="R_17", count=1)]),
+            pandas.DataFrame([dict(flag="IG13", count=300)]),
+        ]
+    )
+    dtypes = dict(flag="category")
+
+    res = get_cache(
+        Config(
+            2019,
+            should_use_columnar_cache=False,
+            should_use_compact_dtypes=should_use_compact_dtypes,
+        )
+    ).get("something", "df", filters=dict(count=Between(low=0)), dtypes=dtypes)
+
+    assert res is not None
+
+    if should_use_compact_dtypes:
+        assert mock_read_csv.call_args.kwargs["dtype"] == dtypes
+        assert res.dtypes.astype(str).to_dict() == dict(flag="category", count="int16")
+    else:
+        assert "dtype" not in mock_read_csv.call_args.kwargs
+        assert res.dtypes.astype(str).to_dict() == dict(flag="object", count="int64")
@@ -1,13 +1,30 @@
-from typing import Dict
+from pathlib import Path
+from typing import Any, Dict, Optional
 
+import bs4
+import callee
 import pytest
 
 from tests.service_test_fixtures import ServiceTestFixture
-from tests.utils import shuffled_cases
-from us_pls._scraper.scraping_service import ScrapingService
+from tests.utils import MockRes, shuffled_cases
+from us_pls._scraper.scraping_service import (
+    ACCORDION_CLASS,
+    CACHED_URLS_FILE,
+    ScrapingService,
+)
+
+MOCK_API_RES = Path(__file__).parents[2] / "integration/mock_api/mock_api_res.html"
 
 
 class TestScrapingService(ServiceTestFixture[ScrapingService]):
+    @pytest.fixture(autouse=True)
+    def given_fixed_time(self, inject_mocker_to_class: None, service_fixture: None):
+        self.mocker.patch("time.time", return_value=1000.0)
+        self.mocker.patch.object(self._service._config, "cached_urls_ttl", None)
+        self.mocker.patch.object(
+            self._service._config, "should_refresh_urls_in_background", False
+        )
+
     @pytest.mark.parametrize(
         *shuffled_cases(
             urls_are_in_cache=[True, False], should_overwrite_cached_urls=[True, False]
@@ -18,10 +35,12 @@ class TestScrapingService(ServiceTestFixture[ScrapingService]):
         urls_are_in_cache: bool,
         should_overwrite_cached_urls: bool,
     ):
-        mock_retval: Dict[str, str] = dict(banana="phone")
+        mock_retval: Dict[str, Dict[str, str]] = dict(banana=dict(CSV="phone"))
 
         self.cast_mock(self._service._cache.get).return_value = (
-            mock_retval if urls_are_in_cache else None
+            dict(banana=dict(scraped_at=900.0, urls=dict(CSV="phone")))
+            if urls_are_in_cache
+            else None
         )
 
         # since we don't want to test BeautifulSoup
@@ -33,6 +52,9 @@ class TestScrapingService(ServiceTestFixture[ScrapingService]):
             "should_overwrite_cached_urls",
             should_overwrite_cached_urls,
         )
+        self.mocker.patch.object(
+            self._service._config, "should_revalidate_cache", False
+        )
 
         res = self._service.scrape_files()
 
@@ -42,7 +64,227 @@ class TestScrapingService(ServiceTestFixture[ScrapingService]):
             self.cast_mock(self._service._cache.put).assert_not_called()
             self.cast_mock(self._service._cache.get).assert_called_once()
         else:
+            self.cast_mock(self._service._cache.put).assert_called_once_with(
+                dict(banana=dict(scraped_at=1000.0, urls=dict(CSV="phone"))),
+                CACHED_URLS_FILE,
+            )
+
+    def test_scrape_files_given_untimestamped_cache(self):
+        urls = dict(CSV="phone")
+        self.cast_mock(self._service._cache.get).return_value = dict(banana=urls)
+        self.mocker.patch.object(
+            self._service._config, "should_overwrite_cached_urls", False
+        )
+        self.mocker.patch.object(
+            self._service._config, "should_revalidate_cache", False
+        )
+
+        assert self._service.scrape_files() == dict(banana=urls)
+
+    @pytest.mark.parametrize(
+        *shuffled_cases(
+            scraped_at=[None, 100.0, 950.0],
+            should_refresh_urls_in_background=[True, False],
+        )
+    )
+    def test_scrape_files_given_ttl(
+        self, scraped_at: Optional[float], should_refresh_urls_in_background: bool
+    ):
+        cached_urls = dict(CSV="phone")
+        scraped_urls = dict(CSV="split")
+        self.cast_mock(self._service._cache.get).return_value = dict(
+            banana=dict(scraped_at=scraped_at, urls=cached_urls)
+        )
+        self.mocker.patch.object(
+            self._service._config, "should_overwrite_cached_urls", False
+        )
+        self.mocker.patch.object(
+            self._service._config, "should_revalidate_cache", False
+        )
+        self.mocker.patch.object(self._service._config, "cached_urls_ttl", 100.0)
+        self.mocker.patch.object(
+            self._service._config,
+            "should_refresh_urls_in_background",
+            should_refresh_urls_in_background,
+        )
+        self.mocker.patch.object(
+            self._service, "_scrape_files", return_value=dict(banana=scraped_urls)
+        )
+        mock_refresh_in_background = self.mocker.patch.object(
+            self._service, "_refresh_in_background"
+        )
+
+        res = self._service.scrape_files()
+
+        is_stale = scraped_at != 950.0
+
+        if not is_stale:
+            assert res == dict(banana=cached_urls)
+            self.cast_mock(self._service._cache.put).assert_not_called()
+            mock_refresh_in_background.assert_not_called()
+        elif should_refresh_urls_in_background:
+            # the stale URLs are served while they're refreshed
+            assert res == dict(banana=cached_urls)
+            mock_refresh_in_background.assert_called_once()
+        else:
+            assert res == dict(banana=scraped_urls)
             self.cast_mock(self._service._cache.put).assert_called_once()
+            mock_refresh_in_background.assert_not_called()
+
+    def test_refresh_keeps_years_that_are_no_longer_listed(self):
+        index: Dict[str, Dict[str, Any]] = {
+            "2016": dict(scraped_at=100.0, urls=dict(CSV="old")),
+            "2017": dict(scraped_at=100.0, urls=dict(CSV="stale")),
+        }
+        self.mocker.patch.object(
+            self._service,
+            "_scrape_files",
+            return_value={"2017": dict(CSV="fresh"), "2018": dict(CSV="new")},
+        )
+        self.cast_mock(self._service._cache.get).return_value = index
+
+        assert self._service._refresh(index) == {
+            "2016": dict(scraped_at=100.0, urls=dict(CSV="old")),
+            "2017": dict(scraped_at=1000.0, urls=dict(CSV="fresh")),
+            "2018": dict(scraped_at=1000.0, urls=dict(CSV="new")),
+        }
+
+    def test_refresh_given_not_modified(self):
+        index: Dict[str, Dict[str, Any]] = {
+            "2016": dict(scraped_at=100.0, urls=dict(CSV="old")),
+            "2017": dict(scraped_at=500.0, urls=dict(CSV="current")),
+        }
+        self.mocker.patch.object(self._service, "_scrape_files", return_value=None)
+        self.cast_mock(self._service._cache.get).return_value = index
+
+        res = self._service._refresh(index)
+
+        # only the years that were listed last time are still listed
+        assert res == {
+            "2016": dict(scraped_at=100.0, urls=dict(CSV="old")),
+            "2017": dict(scraped_at=1000.0, urls=dict(CSV="current")),
+        }
+        self.cast_mock(self._service._cache.put).assert_called_once_with(
+            res, CACHED_URLS_FILE
+        )
+
+    @pytest.mark.parametrize("had_index", [True, False])
+    def test_refresh_given_refreshed_by_another_process(self, had_index: bool):
+        index: Dict[str, Dict[str, Any]] = {
+            "2017": dict(scraped_at=100.0, urls=dict(CSV="stale"))
+        }
+        latest_index: Dict[str, Dict[str, Any]] = {
+            "2017": dict(scraped_at=900.0, urls=dict(CSV="fresh"))
+        }
+        self.cast_mock(self._service._cache.get).return_value = latest_index
+        mock_scrape_files = self.mocker.patch.object(self._service, "_scrape_files")
+
+        res = self._service._refresh(index if had_index else None)
+
+        assert res == latest_index
+        mock_scrape_files.assert_not_called()
+        self.cast_mock(self._service._cache.lock).assert_called_once_with(
+            CACHED_URLS_FILE
+        )
+
+    @pytest.mark.parametrize("should_fail", [True, False])
+    def test_refresh_in_background(self, should_fail: bool):
+        index: Dict[str, Dict[str, Any]] = {
+            "2017": dict(scraped_at=None, urls=dict(CSV="phone"))
+        }
+        mock_refresh = self.mocker.patch.object(
+            self._service,
+            "_refresh",
+            side_effect=Exception("banana") if should_fail else None,
+        )
+
+        thread = self._service._refresh_in_background(index)
+
+        assert thread is not None
+        thread.join()
+
+        mock_refresh.assert_called_once_with(index)
+
+        # the next refresh can go ahead
+        thread = self._service._refresh_in_background(index)
+
+        assert thread is not None
+        thread.join()
+
+    def test_refresh_in_background_given_refresh_in_flight(self):
+        from us_pls._scraper import scraping_service
+
+        mock_refresh = self.mocker.patch.object(self._service, "_refresh")
+
+        with scraping_service._background_refresh_lock:
+            assert self._service._refresh_in_background({}) is None
+
+        mock_refresh.assert_not_called()
+
+    @pytest.mark.parametrize("has_changed", [True, False])
+    def test_scrape_files_given_revalidation(self, has_changed: bool):
+        cached_urls = dict(banana=dict(CSV="phone"))
+        scraped_urls = dict(banana=dict(CSV="split"))
+
+        self.cast_mock(self._service._cache.get).return_value = dict(
+            banana=dict(scraped_at=900.0, urls=dict(CSV="phone"))
+        )
+        self.cast_mock(self._service._cache.get_conditional_headers).return_value = {
+            "If-None-Match": '"abc"'
+        }
+        mock_scrape_files = self.mocker.patch.object(
+            self._service,
+            "_scrape_files",
+            return_value=scraped_urls if has_changed else None,
+        )
+        self.mocker.patch.object(self._service._config, "should_revalidate_cache", True)
+
+        res = self._service.scrape_files()
+
+        mock_scrape_files.assert_called_once_with({"If-None-Match": '"abc"'})
+
+        if has_changed:
+            assert res == scraped_urls
+        else:
+            assert res == cached_urls
+
+        # either way, the index's timestamps are brought up to date
+        self.cast_mock(self._service._cache.put).assert_called_once_with(
+            dict(banana=dict(scraped_at=1000.0, urls=res["banana"])),
+            CACHED_URLS_FILE,
+        )
+
+    def test_scrape_files_given_not_modified(self):
+        mock_get = self.mocker.patch("requests.get", return_value=MockRes(304))
+
+        assert self._service._scrape_files({"If-None-Match": '"abc"'}) is None
+        mock_get.assert_called_once_with(
+            callee.String(), headers={"If-None-Match": '"abc"'}
+        )
+
+    @pytest.mark.parametrize("has_accordions", [True, False])
+    def test_scrape_files_parses_page(self, has_accordions: bool):
+        with open(MOCK_API_RES, "rb") as f:
+            content = f.read()
+
+        if not has_accordions:
+            content = content.replace(ACCORDION_CLASS.encode(), b"paragraph")
+
+        self.mocker.patch("requests.get", return_value=MockRes(200, content))
+
+        res = self._service._scrape_files()
+
+        # the targeted parse finds the same links that a parse of the whole page does
+        assert res == self._service._get_url_dict(
+            bs4.BeautifulSoup(content, "html.parser")
+        )
+        assert res is not None
+        assert (
+            res["2017"]["CSV"] == "/sites/default/files/pls_fy2017_data_files_csv.zip"
+        )
+        assert res["2017"]["News Release"] == (
+            "/news/over-118-million-people-attended-library-programs-annually"
+        )
 
     def test_get_year_for_data(self):
         year_text = "FY 1234"
@@ -6,9 +6,11 @@ from tests.service_test_fixtures import ServiceTestFixture
 from us_pls._config import Config
 from us_pls._download.models import DatafileType
 from us_pls._logger.interface import ILoggerFactory
-from us_pls._persistence.interface import IOnDiskCache
+from us_pls._persistence.interface import IInMemoryCache, IOnDiskCache
+from us_pls._persistence.models import Between
 from us_pls._stats.stats_service import StatsService
 from us_pls._transformer.interface import ITransformationService
+from us_pls._variables.interface import IVariableRepository
 
 read_csv_retval = pandas.DataFrame(
     [
@@ -38,13 +40,17 @@ class LightStatsService(StatsService):
     def __init__(
         self,
         cache: IOnDiskCache,
+        results_cache: IInMemoryCache,
         transformer: ITransformationService,
+        variable_repo: IVariableRepository,
         logger_factory: ILoggerFactory,
     ) -> None:
         super().__init__(
             config=Config(2018),
             cache=cache,
+            results_cache=results_cache,
             transformer=transformer,
+            variable_repo=variable_repo,
             logger_factory=logger_factory,
         )
 
@@ -70,13 +76,23 @@ class TestStatsService(ServiceTestFixture[LightStatsService]):
             "transform_columns",
             return_value=read_csv_retval,
         )
+        self.mocker.patch.object(
+            self._service._results_cache, "get", side_effect=[None, read_csv_retval]
+        )
 
         res = self._service.get_stats(datafile_type)
 
         mock_cache_get.assert_called_once_with(
-            String() & EndsWith(datafile_type.value), "df"
+            String() & EndsWith(datafile_type.value),
+            "df",
+            columns=None,
+            filters=None,
+            dtypes=self._service._variable_repo.get_dtypes_for.return_value,  # type: ignore
         )
         mock_transform.assert_called_once()
+        self.cast_mock(self._service._results_cache.put).assert_called_once_with(
+            (2018, datafile_type, None, None), read_csv_retval
+        )
         assert res.to_dict("records") == [
             {
                 "short1": "short 1 val 1",
@@ -98,13 +114,173 @@ class TestStatsService(ServiceTestFixture[LightStatsService]):
             },
         ]
 
+    def test_get_stats_given_columns(self):
+        self.mocker.patch.object(self._service._results_cache, "get", return_value=None)
+        mock_get_original_columns = self.mocker.patch.object(
+            self._service._variable_repo,
+            "get_original_columns",
+            return_value=["short1", "short2"],
+        )
+        self.mocker.patch.object(
+            self._service._variable_repo,
+            "get_year_columns",
+            side_effect=lambda _, cols: [f"{col}_2017" for col in cols],
+        )
+        mock_cache_get = self.mocker.patch.object(
+            self._service._cache, "get", return_value=read_csv_retval
+        )
+        mock_align = self.mocker.patch.object(
+            self._service._transformer, "align_columns"
+        )
+
+        self._service.get_stats(
+            DatafileType.SystemData, columns=["Renamed1", "Renamed2"]
+        )
+
+        mock_get_original_columns.assert_called_once_with(
+            DatafileType.SystemData, ["Renamed1", "Renamed2"]
+        )
+        # the datafile is read with that year's names...
+        mock_cache_get.assert_called_once_with(
+            DatafileType.SystemData.value,
+            "df",
+            columns=["short1_2017", "short2_2017"],
+            filters=None,
+            dtypes=self._service._variable_repo.get_dtypes_for.return_value,  # type: ignore
+        )
+        # ...and then aligned to the canonical ones
+        mock_align.assert_called_once_with(
+            read_csv_retval, DatafileType.SystemData, ["short1", "short2"]
+        )
+        self.cast_mock(self._service._results_cache.put).assert_called_once_with(
+            (2018, DatafileType.SystemData, ("short1", "short2"), None),
+            self._service._transformer.transform_columns.return_value,  # type: ignore
+        )
+
+    def test_get_stats_given_where(self):
+        self.mocker.patch.object(self._service._results_cache, "get", return_value=None)
+        self.mocker.patch.object(
+            self._service._variable_repo,
+            "get_original_columns",
+            side_effect=lambda _, cols: [f"original_{cols[0]}"],
+        )
+        self.mocker.patch.object(
+            self._service._variable_repo,
+            "get_year_columns",
+            side_effect=lambda _, cols: list(cols),
+        )
+        mock_cache_get = self.mocker.patch.object(
+            self._service._cache, "get", return_value=read_csv_retval
+        )
+        population_range = Between(low=10, high=100)
+
+        self._service.get_stats(
+            DatafileType.SystemData,
+            where=dict(State=["PA", "NJ"], Population=population_range, Name="Lib"),
+        )
+
+        expected_filters = dict(
+            original_State=("PA", "NJ"),
+            original_Population=population_range,
+            original_Name=("Lib",),
+        )
+
+        mock_cache_get.assert_called_once_with(
+            DatafileType.SystemData.value,
+            "df",
+            columns=None,
+            filters=expected_filters,
+            dtypes=self._service._variable_repo.get_dtypes_for.return_value,  # type: ignore
+        )
+        self.cast_mock(self._service._results_cache.put).assert_called_once_with(
+            (
+                2018,
+                DatafileType.SystemData,
+                None,
+                tuple(sorted(expected_filters.items())),
+            ),
+            self._service._transformer.transform_columns.return_value,  # type: ignore
+        )
+
+    @pytest.mark.parametrize("should_convert_sentinels", [True, False])
+    def test_get_stats_given_should_convert_sentinels(
+        self, should_convert_sentinels: bool
+    ):
+        self.mocker.patch.object(
+            self._service._config, "should_convert_sentinels", should_convert_sentinels
+        )
+        self.mocker.patch.object(self._service._results_cache, "get", return_value=None)
+        self.mocker.patch.object(
+            self._service._cache, "get", return_value=read_csv_retval
+        )
+        mock_align = self.mocker.patch.object(
+            self._service._transformer, "align_columns"
+        )
+        mock_convert = self.mocker.patch.object(
+            self._service._transformer, "convert_sentinels"
+        )
+        mock_transform = self.mocker.patch.object(
+            self._service._transformer, "transform_columns"
+        )
+
+        self._service.get_stats(DatafileType.SystemData)
+
+        mock_align.assert_called_once_with(
+            read_csv_retval, DatafileType.SystemData, None
+        )
+
+        if should_convert_sentinels:
+            mock_convert.assert_called_once_with(
+                mock_align.return_value, DatafileType.SystemData
+            )
+            mock_transform.assert_called_once_with(
+                mock_convert.return_value, DatafileType.SystemData
+            )
+        else:
+            mock_convert.assert_not_called()
+            mock_transform.assert_called_once_with(
+                mock_align.return_value, DatafileType.SystemData
+            )
+
     def test_get_stats_given_none(self):
+        self.mocker.patch.object(self._service._results_cache, "get", return_value=None)
         self.mocker.patch.object(self._service._cache, "get", return_value=None)
 
         res = self._service.get_stats(DatafileType.OutletData)
 
         assert res.empty
 
+    def test_get_stats_given_memoized(self):
+        self.mocker.patch.object(
+            self._service._results_cache, "get", return_value=read_csv_retval
+        )
+
+        res = self._service.get_stats(DatafileType.OutletData)
+
+        assert res is read_csv_retval
+        self.cast_mock(self._service._cache.get).assert_not_called()
+        self.cast_mock(self._service._transformer.transform_columns).assert_not_called()
+
+    def test_get_stats_given_not_memoizable(self):
+        self.mocker.patch.object(self._service._results_cache, "get", return_value=None)
+        self.mocker.patch.object(
+            self._service._cache, "get", return_value=read_csv_retval
+        )
+        self.mocker.patch.object(
+            self._service._transformer,
+            "transform_columns",
+            return_value=read_csv_retval,
+        )
+
+        res = self._service.get_stats(DatafileType.OutletData)
+
+        assert res is read_csv_retval
+
+    def test_clear_memoized_stats(self):
+        self._service.clear_memoized_stats()
+
+        self.cast_mock(self._service._results_cache.clear).assert_called_once()
+
     def test_read_docs_given_no_docs(
         self,
     ):
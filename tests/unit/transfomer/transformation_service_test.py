@@ -7,8 +7,10 @@ from us_pls._config import Config
 from us_pls._download.models import DatafileType
 from us_pls._logger.interface import ILoggerFactory
 from us_pls._transformer.transformation_service import TransformationService
+from us_pls._variables.crosswalk import Crosswalk
 from us_pls._variables.interface import IVariableRepository
-from us_pls._variables.models import Variables
+from us_pls._variables.models import RenameMaps, Variables
+from us_pls._variables.schema import VariableKind
 
 default_config = Config(2019)
 
@@ -21,6 +23,49 @@ class LightTransformationService(TransformationService):
 
 
 class TestTransformationService(ServiceTestFixture[LightTransformationService]):
+    def test_align_columns(self):
+        df = pd.DataFrame([dict(old_var1="val1", var2="val2")])
+
+        self.mocker.patch.object(
+            self._service._variable_repo,
+            "get_crosswalk_for",
+            return_value=Crosswalk(renames={"old_var1": "var1"}),
+        )
+        self.mocker.patch.object(
+            self._service._variable_repo,
+            "get_rename_maps_for",
+            return_value=RenameMaps.from_variables(
+                Variables(var1="code1", var2="code2", var3="code3")
+            ),
+        )
+
+        res = self._service.align_columns(df, DatafileType.OutletData)
+
+        assert res.columns.tolist() == ["var1", "var2", "var3"]
+        assert res["var1"].tolist() == ["val1"]
+
+    def test_align_columns_given_columns(self):
+        df = pd.DataFrame([dict(old_var1="val1")])
+
+        self.mocker.patch.object(
+            self._service._variable_repo,
+            "get_crosswalk_for",
+            return_value=Crosswalk(renames={"old_var1": "var1"}),
+        )
+
+        res = self._service.align_columns(df, DatafileType.OutletData, ["var1", "var3"])
+
+        assert res.columns.tolist() == ["var1", "var3"]
+
+    def test_align_columns_given_no_crosswalk(self):
+        df = pd.DataFrame([dict(old_var1="val1")])
+
+        self.mocker.patch.object(
+            self._service._variable_repo, "get_crosswalk_for", return_value=None
+        )
+
+        assert self._service.align_columns(df, DatafileType.OutletData) is df
+
     def test_transform_columns(self):
         repo_res = Variables(var1="code1", var2="code2")
         df = pd.DataFrame(
@@ -28,7 +73,9 @@ class TestTransformationService(ServiceTestFixture[LightTransformationService]):
         )
 
         self.mocker.patch.object(
-            self._service._variable_repo, "get_variables_for", return_value=repo_res
+            self._service._variable_repo,
+            "get_rename_maps_for",
+            return_value=RenameMaps.from_variables(repo_res),
         )
 
         res = self._service.transform_columns(df, DatafileType.OutletData)
@@ -39,6 +86,24 @@ class TestTransformationService(ServiceTestFixture[LightTransformationService]):
         ]
         self.cast_mock(self._service._logger.warning).assert_not_called()
 
+    def test_transform_columns_given_nested_variables(self):
+        repo_res = Variables(
+            Parent=Variables(var1="Child1", var2="Child2"), var3="code3"
+        )
+        df = pd.DataFrame([dict(var1="val1", var3="val3")])
+
+        self.mocker.patch.object(
+            self._service._variable_repo,
+            "get_rename_maps_for",
+            return_value=RenameMaps.from_variables(repo_res),
+        )
+
+        res = self._service.transform_columns(df, DatafileType.OutletData)
+
+        # a subset of the columns is fine, as long as they were all renamed
+        assert res.columns.tolist() == ["Parent_Child1", "code3"]
+        self.cast_mock(self._service._logger.warning).assert_not_called()
+
     def test_transform_columns_given_imperfect_match(self):
         repo_res = Variables(var1="code1", var2="code2", var3="code3", var4="code4")
         df = pd.DataFrame(
@@ -48,7 +113,9 @@ class TestTransformationService(ServiceTestFixture[LightTransformationService]):
             ]
         )
         self.mocker.patch.object(
-            self._service._variable_repo, "get_variables_for", return_value=repo_res
+            self._service._variable_repo,
+            "get_rename_maps_for",
+            return_value=RenameMaps.from_variables(repo_res),
         )
 
         res = self._service.transform_columns(df, DatafileType.OutletData)
@@ -67,3 +134,44 @@ class TestTransformationService(ServiceTestFixture[LightTransformationService]):
                 "The following mappings were not used to rename any columns: ['var3', 'var4']"
             ),
         ]
+
+    def test_convert_sentinels(self):
+        df = pd.DataFrame(
+            [
+                dict(POPU_LSA=100, MASTER=1.5, LONGITUD=-75.1, F_POPLSA="R_17"),
+                dict(POPU_LSA=-3, MASTER=-9.0, LONGITUD=-80.2, F_POPLSA="IG13"),
+                dict(POPU_LSA=-1, MASTER=2.0, LONGITUD=-90.3, F_POPLSA="R_17"),
+            ]
+        ).astype(dict(POPU_LSA="int32"))
+        self.mocker.patch.object(
+            self._service._variable_repo,
+            "get_variable_kinds_for",
+            return_value=dict(
+                POPU_LSA=VariableKind.Count,
+                MASTER=VariableKind.Count,
+                LONGITUD=VariableKind.Descriptive,
+                F_POPLSA=VariableKind.Flag,
+            ),
+        )
+
+        res = self._service.convert_sentinels(df, DatafileType.SystemData)
+
+        assert res.dtypes.astype(str).to_dict() == dict(
+            POPU_LSA="Int32", MASTER="Float64", LONGITUD="float64", F_POPLSA="object"
+        )
+        assert res["POPU_LSA"].isna().tolist() == [False, True, True]
+        assert res["MASTER"].isna().tolist() == [False, True, False]
+        assert res["LONGITUD"].tolist() == [-75.1, -80.2, -90.3]
+        assert res["POPU_LSA"].sum() == 100
+
+    def test_convert_sentinels_given_no_count_columns(self):
+        df = pd.DataFrame([dict(STABR="PA")])
+        self.mocker.patch.object(
+            self._service._variable_repo,
+            "get_variable_kinds_for",
+            return_value=dict(STABR=VariableKind.Code),
+        )
+
+        res = self._service.convert_sentinels(df, DatafileType.SystemData)
+
+        assert res is df
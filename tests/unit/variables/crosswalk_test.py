@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from us_pls._variables.crosswalk import Crosswalk
+
+crosswalk = Crosswalk(
+    renames={"LOCALE": "LOCALE_ADD"},
+    splits={"TOTCIR": ("KIDCIRCL", "ADLTCIRC")},
+    dropped=frozenset(["OLDCODE"]),
+)
+
+
+def test_align():
+    df = pd.DataFrame(
+        [
+            dict(STABR="PA", LOCALE=11, KIDCIRCL=1, ADLTCIRC=2, OLDCODE=0, EXTRA="a"),
+            dict(STABR="NJ", LOCALE=21, KIDCIRCL=3, ADLTCIRC=4, OLDCODE=0, EXTRA="b"),
+        ]
+    )
+
+    res = crosswalk.align(df, ["STABR", "LOCALE_ADD", "TOTCIR", "WEBVISIT"])
+
+    assert res.columns.tolist() == [
+        "STABR",
+        "LOCALE_ADD",
+        "TOTCIR",
+        "WEBVISIT",
+        "EXTRA",
+    ]
+    assert res["LOCALE_ADD"].tolist() == [11, 21]
+    assert res["TOTCIR"].tolist() == [3, 7]
+    assert np.isnan(res["WEBVISIT"]).all()
+
+
+def test_align_given_missing_split_parts():
+    df = pd.DataFrame([dict(STABR="PA", KIDCIRCL=1)])
+
+    res = crosswalk.align(df, ["STABR", "TOTCIR"])
+
+    assert res.columns.tolist() == ["STABR", "TOTCIR"]
+    assert np.isnan(res["TOTCIR"]).all()
+
+
+def test_align_given_empty_crosswalk():
+    df = pd.DataFrame([dict(STABR="PA")])
+
+    res = Crosswalk().align(df, ["STABR", "WEBVISIT"])
+
+    assert res.columns.tolist() == ["STABR", "WEBVISIT"]
+
+
+def test_to_year_columns():
+    assert crosswalk.to_year_columns(["STABR", "LOCALE_ADD", "TOTCIR"]) == [
+        "STABR",
+        "LOCALE",
+        "KIDCIRCL",
+        "ADLTCIRC",
+    ]
+
+
+def test_to_year_dtypes():
+    assert crosswalk.to_year_dtypes(
+        {"STABR": "category", "LOCALE_ADD": "category", "TOTCIR": "int64"}
+    ) == {"STABR": "category", "LOCALE": "category"}
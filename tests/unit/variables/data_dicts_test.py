@@ -0,0 +1,50 @@
+import importlib
+import subprocess
+import sys
+from pathlib import Path
+
+from pytest_mock.plugin import MockerFixture
+
+from us_pls._download.models import DatafileType
+from us_pls._variables._data_dicts import DATA_DICT_PACKAGES, LazyDataDicts
+from us_pls._variables.fy2018 import system_data_vars
+
+
+def test_lazy_data_dicts_only_import_on_lookup(mocker: MockerFixture):
+    spy_import = mocker.spy(importlib, "import_module")
+    data_dicts = LazyDataDicts(DATA_DICT_PACKAGES)
+
+    assert list(data_dicts.keys()) == [2018]
+    spy_import.assert_not_called()
+
+    assert (
+        data_dicts[2018][DatafileType.SystemData]
+        == system_data_vars.SYSTEM_DATA_VARIABLES
+    )
+    assert spy_import.call_count == 3
+
+    # later lookups reuse what was loaded
+    _ = data_dicts[2018]
+    assert spy_import.call_count == 3
+
+
+def test_lazy_data_dicts_given_missing_year():
+    data_dicts = LazyDataDicts(DATA_DICT_PACKAGES)
+
+    assert data_dicts.get(1111) is None
+    assert 1111 not in data_dicts
+
+
+def test_import_does_not_pull_in_web_dependencies():
+    code = "import sys, us_pls; print(sorted({'requests', 'bs4'} & set(sys.modules)))"
+
+    res = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        # the repo root, so that `us_pls` can be imported
+        cwd=Path(__file__).parents[3],
+    )
+
+    assert res.stdout.strip() == "[]"
@@ -0,0 +1,36 @@
+from us_pls._variables.models import Variables
+from us_pls._variables.schema import VariableKind, get_dtypes, get_variable_kinds
+
+variables = Variables(
+    STABR="State",
+    LibraryIdCode=Variables(FSCSKEY="FromIMLS"),
+    StreetAddress=Variables(ADDRESS="Address", ZIP="ZipCode"),
+    Population=Variables(
+        Of=Variables(
+            POPU_LSA="LegalServiceArea",
+            F_POPLSA="LegalServiceArea_ImputationFlag",
+        )
+    ),
+    LONGITUD="Longitude",
+)
+
+
+def test_get_variable_kinds():
+    assert get_variable_kinds(variables) == {
+        "STABR": VariableKind.Code,
+        "FSCSKEY": VariableKind.Identifier,
+        "ADDRESS": VariableKind.Descriptive,
+        "ZIP": VariableKind.Identifier,
+        "POPU_LSA": VariableKind.Count,
+        "F_POPLSA": VariableKind.Flag,
+        "LONGITUD": VariableKind.Descriptive,
+    }
+
+
+def test_get_dtypes():
+    assert get_dtypes(get_variable_kinds(variables)) == {
+        "STABR": "category",
+        "FSCSKEY": "str",
+        "ZIP": "str",
+        "F_POPLSA": "category",
+    }
@@ -1,3 +1,5 @@
+from typing import Any, List
+
 import pytest
 from pytest_mock.plugin import MockerFixture
 
@@ -5,8 +7,10 @@ from tests.service_test_fixtures import ServiceTestFixture
 from us_pls._config import Config
 from us_pls._download.models import DatafileType
 from us_pls._logger.interface import ILoggerFactory
+from us_pls._variables.crosswalk import Crosswalk
 from us_pls._variables.models import Variables
 from us_pls._variables.repository import VariableRepository
+from us_pls._variables.schema import VariableKind
 
 default_config = Config(2019)
 
@@ -49,6 +53,18 @@ class TestVariableRepo(ServiceTestFixture[LightVariableRepo]):
             "Could not get variable data for year 1111. Getting variables for 2019 instead"
         )
 
+    def test_get_data_dict_for_year_given_crosswalk(self):
+        self.mocker.patch.object(self._service._config, "year", 2017)
+        self.mocker.patch(
+            "us_pls._variables.repository.CROSSWALKS",
+            {2017: {DatafileType.OutletData: Crosswalk()}},
+        )
+
+        res = self._service._get_data_dict_for_year()
+
+        assert res == data_dict_2019
+        self.cast_mock(self._service._logger.warning).assert_not_called()
+
     def test_get_data_dict_for_year(self):
         res = self._service._get_data_dict_for_year()
 
@@ -100,3 +116,89 @@ class TestVariableRepo(ServiceTestFixture[LightVariableRepo]):
             == data_dict_2019[DatafileType.SummaryData]
         )
         assert self._service.get_variables_for("banana") == None  # type: ignore
+
+    @pytest.mark.parametrize(
+        "columns,expected",
+        [
+            (["parent1_sub_code1", "code1"], ["subCode1", "var1"]),
+            (
+                [
+                    Variables(
+                        sub_code1="parent1_sub_code1", sub_code2="parent1_sub_code2"
+                    )
+                ],
+                ["subCode1", "subCode2"],
+            ),
+            (["parent1_sub_code1", "subCode1"], ["subCode1"]),
+            (["NOT_RENAMED"], ["NOT_RENAMED"]),
+        ],
+    )
+    def test_get_original_columns(self, columns: List[Any], expected: List[str]):
+        assert (
+            self._service.get_original_columns(DatafileType.OutletData, columns)
+            == expected
+        )
+
+    def test_get_variable_kinds_for(self):
+        assert self._service.get_variable_kinds_for(DatafileType.OutletData) == {
+            "var1": VariableKind.Count,
+            "subCode1": VariableKind.Count,
+            "subCode2": VariableKind.Count,
+        }
+        assert self._service.get_variable_kinds_for("banana") == {}  # type: ignore
+
+    def test_get_dtypes_for(self):
+        self._service._init_repository()
+
+        assert self._service.get_dtypes_for(DatafileType.OutletData) == {}
+        assert self._service.get_dtypes_for("banana") == {}  # type: ignore
+
+    def test_get_year_columns(self):
+        self.mocker.patch.object(self._service._config, "year", 2017)
+        self.mocker.patch(
+            "us_pls._variables.repository.CROSSWALKS",
+            {2017: {DatafileType.OutletData: Crosswalk(renames={"old_var1": "var1"})}},
+        )
+
+        self._service._init_repository()
+
+        assert self._service.get_year_columns(
+            DatafileType.OutletData, ["var1", "subCode1"]
+        ) == ["old_var1", "subCode1"]
+        assert self._service.get_year_columns(DatafileType.SystemData, ["var3"]) == [
+            "var3"
+        ]
+
+    def test_get_rename_maps_for(self):
+        self._service._init_repository()
+
+        rename_maps = self._service.get_rename_maps_for(DatafileType.OutletData)
+
+        assert dict(rename_maps.forward) == {
+            "var1": "code1",
+            "subCode1": "parent1_sub_code1",
+            "subCode2": "parent1_sub_code2",
+        }
+        assert dict(rename_maps.inverse) == {
+            "code1": "var1",
+            "parent1_sub_code1": "subCode1",
+            "parent1_sub_code2": "subCode2",
+        }
+        assert rename_maps.original_columns == ("var1", "subCode1", "subCode2")
+        assert rename_maps.renamed_columns == (
+            "code1",
+            "parent1_sub_code1",
+            "parent1_sub_code2",
+        )
+        assert "parent1_sub_code1" in rename_maps.renamed_column_set
+
+        with pytest.raises(TypeError):
+            rename_maps.forward["var1"] = "banana"  # type: ignore
+
+        # the maps are only worked out once
+        assert self._service.get_rename_maps_for(DatafileType.OutletData) is rename_maps
+
+    def test_get_rename_maps_for_given_missing_datafile(self):
+        rename_maps = self._service.get_rename_maps_for("banana")  # type: ignore
+
+        assert len(rename_maps.forward) == 0
@@ -1,3 +1,4 @@
+import pickle
 from typing import Any, Dict, List, Union
 
 import pytest
@@ -90,3 +91,48 @@ def test_to_dict_from_dict():
         A0=dict(B0="A0_B0"), A1=dict(B1=dict(C1="A1_B1_C1"))
     )
     assert Variables.from_dict(variables.to_dict()) == variables
+
+
+def test_attribute_access():
+    variables = Variables(A0=Variables(B0="A0_B0"), C0="C0")
+
+    assert variables.A0.B0 == "A0_B0"
+    assert variables.C0 == "C0"
+    assert "A0" in dir(variables)
+
+    with pytest.raises(AttributeError):
+        variables.banana
+
+
+def test_variables_are_immutable():
+    variables = Variables(A0="A0")
+
+    with pytest.raises(AttributeError):
+        variables.A0 = "banana"  # type: ignore
+
+    with pytest.raises(AttributeError):
+        del variables.A0
+
+    with pytest.raises(TypeError):
+        variables["A0"] = "banana"  # type: ignore
+
+
+def test_hash_and_eq():
+    variables = Variables(A0=Variables(B0="A0_B0"), A1="A1")
+
+    assert variables == Variables(A1="A1", A0=Variables(B0="A0_B0"))
+    assert hash(variables) == hash(Variables(A1="A1", A0=Variables(B0="A0_B0")))
+    assert variables != Variables(A0=Variables(B0="banana"), A1="A1")
+    assert {variables: 1}[Variables(A0=Variables(B0="A0_B0"), A1="A1")] == 1
+
+
+def test_pickle_round_trip():
+    variables = system_data_vars.SYSTEM_DATA_VARIABLES.reorient()
+
+    unpickled = pickle.loads(pickle.dumps(variables))
+
+    assert unpickled == variables
+    assert (
+        unpickled.OperatingRevenue.From.LocalGovernment
+        == "OperatingRevenue_From_LocalGovernment"
+    )
@@ -1,5 +1,5 @@
 from itertools import product
-from typing import Any, Collection, Dict, List, Tuple
+from typing import Any, Collection, Dict, Iterator, List, Tuple
 
 import pandas
 from callee.base import Matcher
@@ -84,10 +84,24 @@ def shuffled_cases(**kwargs: List[Any]) -> Tuple[List[str], List[Any]]:
 class MockRes:
     status_code: int
     content: Collection[Any]
-
-    def __init__(self, status_code: int, content: Collection[Any] = {}) -> None:
+    headers: Dict[str, str]
+
+    def __init__(
+        self,
+        status_code: int,
+        content: Collection[Any] = {},
+        headers: Dict[str, str] = {},
+    ) -> None:
         self.status_code = status_code
         self.content = content
+        self.headers = headers
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[Any]:
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i : i + chunk_size]  # type: ignore
+
+    def close(self) -> None:
+        pass
 
     def json(self) -> Collection[Any]:
         if self.status_code != 200:
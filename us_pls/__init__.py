@@ -1,4 +1,5 @@
 # pyright: reportUnusedImport=false
 
 from us_pls._download.models import DatafileType
-from us_pls.libraries import PublicLibrariesSurvey
+from us_pls._persistence.models import Between
+from us_pls.libraries import PublicLibrariesSurvey, PublicLibrariesSurveyPanel
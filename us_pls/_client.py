@@ -1,42 +1,68 @@
 import logging
-from typing import Dict
+from typing import Any, Dict, Mapping, Optional, Sequence, Union
 
 import pandas as pd
 
+from us_pls._config import Config
 from us_pls._download.interface import IDownloadService
 from us_pls._download.models import DatafileType
 from us_pls._logger.interface import ILoggerFactory
+from us_pls._persistence.interface import IOnDiskCache
 from us_pls._stats.interface import IStatsService
 from us_pls._variables.interface import IVariableRepository
 from us_pls._variables.models import Variables
 
 
 class LibrariesClient:
+    _config: Config
     _stats_service: IStatsService
     _downloader: IDownloadService
     _variable_repo: IVariableRepository
+    _cache: IOnDiskCache
     _logger: logging.Logger
 
     def __init__(
         self,
+        config: Config,
         stats_service: IStatsService,
         downloader: IDownloadService,
         variable_repo: IVariableRepository,
+        cache: IOnDiskCache,
         logger_factory: ILoggerFactory,
     ) -> None:
+        self._config = config
         self._stats_service = stats_service
         self._downloader = downloader
         self._variable_repo = variable_repo
+        self._cache = cache
         self._logger = logger_factory.get_logger(__name__)
 
-        self.__init_client()
+        if not self._config.should_download_lazily:
+            self.__init_client()
 
-    def get_stats(self, _from: DatafileType) -> pd.DataFrame:
-        return self._stats_service.get_stats(_from)
+    def get_stats(
+        self,
+        _from: DatafileType,
+        columns: Optional[Sequence[Union[str, Variables]]] = None,
+        where: Optional[Mapping[str, Any]] = None,
+    ) -> pd.DataFrame:
+        if self._config.should_download_lazily:
+            self._downloader.download_datafile(_from)
+
+        return self._stats_service.get_stats(_from, columns=columns, where=where)
 
     def read_docs(self, on: DatafileType) -> None:
+        if self._config.should_download_lazily:
+            self._downloader.download_documentation()
+
         self._stats_service.read_docs(on)
 
+    def clear_memoized_stats(self) -> None:
+        self._stats_service.clear_memoized_stats()
+
+    def collect_garbage(self) -> int:
+        return self._cache.collect_garbage()
+
     @property
     def summary_data_vars(self) -> Variables:
         return self._variable_repo.summary_data_vars
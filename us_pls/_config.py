@@ -1,4 +1,5 @@
 from dataclasses import dataclass, field
+from typing import Optional
 
 from us_pls._logger.configure_logger import DEFAULT_LOG_FILE
 
@@ -12,3 +13,14 @@ class Config:
     log_file: str = field(default=DEFAULT_LOG_FILE)
     should_overwrite_cached_urls: bool = field(default=False)
     should_overwrite_existing_cache: bool = field(default=False)
+    should_revalidate_cache: bool = field(default=False)
+    cached_urls_ttl: Optional[float] = field(default=None)
+    should_refresh_urls_in_background: bool = field(default=False)
+    should_use_columnar_cache: bool = field(default=True)
+    should_use_compact_dtypes: bool = field(default=True)
+    should_convert_sentinels: bool = field(default=False)
+    should_download_lazily: bool = field(default=False)
+    should_keep_archive: bool = field(default=False)
+    should_use_blob_store: bool = field(default=False)
+    should_memoize_stats: bool = field(default=True)
+    memoized_stats_max_bytes: Optional[int] = field(default=None)
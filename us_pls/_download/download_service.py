@@ -1,65 +1,171 @@
 # pyright: reportUnknownMemberType=false
 
 import logging
+import threading
 import zipfile
-from pathlib import Path
-from typing import Dict
-
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
 
 from us_pls._config import Config
 from us_pls._download.interface import IDownloadService
 from us_pls._download.models import DatafileType, DownloadType
+from us_pls._download.session import LazySession
 from us_pls._logger.interface import ILoggerFactory
 from us_pls._persistence.interface import IOnDiskCache
+from us_pls._persistence.on_disk_cache import CacheException
 from us_pls._scraper.interface import IScrapingService
+from us_pls._variables.interface import IVariableRepository
+
+if TYPE_CHECKING:
+    import requests
 
 BASE_URL = "https://www.imls.gov"
 
+# the scraped resource's name, and what we're storing it as
+RESOURCES: List[Tuple[str, DownloadType]] = [
+    ("Documentation", DownloadType.Documentation),
+    ("CSV", DownloadType.CsvZip),
+    ("Data Element Definitions", DownloadType.DataElementDefinitions),
+]
+
+# large enough to keep syscalls down, small enough
+# that peak memory doesn't depend on the size of the download
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+README = "README.txt"
+
+# the zip is extracted here before its files get moved into place,
+# so that we never pick up files that are still being downloaded
+EXTRACTION_DIR = "_extracted"
+
 
 class DownloadService(IDownloadService):
     _config: Config
     _scraper: IScrapingService
     _cache: IOnDiskCache
+    _variable_repo: IVariableRepository
+    _session: LazySession
     _logger: logging.Logger
 
+    _lock: threading.Lock
+
     def __init__(
         self,
         config: Config,
         scraper: IScrapingService,
         cache: IOnDiskCache,
+        variable_repo: IVariableRepository,
+        session: LazySession,
         logger_factory: ILoggerFactory,
     ) -> None:
         self._config = config
         self._scraper = scraper
         self._cache = cache
+        self._variable_repo = variable_repo
+        self._session = session
         self._logger = logger_factory.get_logger(__name__)
 
+        # lazy downloads can be kicked off from several threads at once
+        self._lock = threading.Lock()
+
     def download(self) -> None:
+        scraped_dict_for_year = self._get_scraped_dict_for_year()
+
+        if scraped_dict_for_year is None:
+            return
+
+        # each resource is written to its own file,
+        # so they can safely be downloaded side by side
+        with ThreadPoolExecutor(max_workers=len(RESOURCES)) as executor:
+            futures = [
+                executor.submit(
+                    self._try_download_resource,
+                    scraped_dict_for_year,
+                    resource,
+                    download_type,
+                )
+                for resource, download_type in RESOURCES
+            ]
+
+            for future in futures:
+                # surfaces any exception raised in the worker thread
+                future.result()
+
+        self._clean_up_readme()
+
+    def download_datafile(self, datafile_type: DatafileType) -> None:
+        with self._lock:
+            if self._download_from_archive(datafile_type.value):
+                self._cache.convert_to_columnar(
+                    datafile_type.value,
+                    dtypes=self._variable_repo.get_dtypes_for(datafile_type),
+                )
+
+    def download_documentation(self) -> None:
+        with self._lock:
+            scraped_dict_for_year = self._get_scraped_dict_for_year()
+
+            if scraped_dict_for_year is None:
+                return
+
+            for resource, download_type in RESOURCES:
+                if download_type != DownloadType.CsvZip:
+                    self._try_download_resource(
+                        scraped_dict_for_year, resource, download_type
+                    )
+
+            if self._download_from_archive(README):
+                self._clean_up_readme()
+
+    def _get_scraped_dict_for_year(self) -> Optional[Dict[str, str]]:
         scraped_dict = self._scraper.scrape_files()
 
         scraped_dict_for_year = scraped_dict.get(str(self._config.year))
 
         if scraped_dict_for_year is None:
             self._logger.info(f"There is no data for {self._config.year}")
-            return
 
-        self._try_download_resource(
-            scraped_dict_for_year, "Documentation", DownloadType.Documentation
-        )
+        return scraped_dict_for_year
 
-        self._try_download_resource(scraped_dict_for_year, "CSV", DownloadType.CsvZip)
+    def _download_from_archive(self, resource_name: str) -> bool:
+        if self._cache.exists(resource_name):
+            return False
 
-        self._try_download_resource(
-            scraped_dict_for_year,
-            "Data Element Definitions",
-            DownloadType.DataElementDefinitions,
-        )
+        scraped_dict_for_year = self._get_scraped_dict_for_year()
 
-        self._clean_up_readme()
+        if scraped_dict_for_year is None:
+            return False
+
+        # other processes could be extracting from (or removing) the same archive
+        with self._cache.lock(DownloadType.CsvZip.value):
+            # ...and might have extracted this while we waited
+            if self._cache.exists(resource_name):
+                return False
+
+            self._download_resource(scraped_dict_for_year, "CSV", DownloadType.CsvZip)
+
+            # if the archive is being kept, it's already been indexed
+            if self._cache.exists(resource_name) or not self._cache.exists(
+                DownloadType.CsvZip.value
+            ):
+                return False
+
+            self._extract_member(resource_name)
+            self._remove_archive_if_exhausted()
+
+            return self._cache.exists(resource_name)
 
     def _try_download_resource(
         self, scraped_dict: Dict[str, str], resource: str, download_type: DownloadType
+    ) -> None:
+        # when several processes share a cache, only one of them downloads
+        # each resource; the rest wait for it, and then find it already exists
+        with self._cache.lock(download_type.value):
+            self._download_resource(scraped_dict, resource, download_type)
+
+    def _download_resource(
+        self, scraped_dict: Dict[str, str], resource: str, download_type: DownloadType
     ) -> None:
         route = scraped_dict.get(resource)
 
@@ -71,28 +177,62 @@ class DownloadService(IDownloadService):
             )
             return
 
+        headers: Dict[str, str] = {}
+
         if self._resource_already_exists(download_type):
-            self._logger.debug(
-                f"Resources have already been downloaded for {download_type.value}"
-            )
-            return
+            if not self._config.should_revalidate_cache:
+                self._logger.debug(
+                    f"Resources have already been downloaded for {download_type.value}"
+                )
+                return
+
+            # only pull the resource again if it's changed
+            headers = self._cache.get_conditional_headers(download_type.value)
 
         url = f"{BASE_URL}/{route[1:] if route.startswith('/') else route}"
 
-        res = requests.get(url)
+        res = self._session.get(url, stream=True, headers=headers)
 
-        if res.status_code != 200:
-            msg = f"Received a non-200 status code for {url}: {res.status_code}"
+        try:
+            if res.status_code == 304:
+                self._logger.debug(f"{download_type.value} has not changed")
+                return
 
-            self._logger.warning(msg)
+            if res.status_code != 200:
+                msg = f"Received a non-200 status code for {url}: {res.status_code}"
 
-            return
+                self._logger.warning(msg)
 
-        self._write_content(
-            download_type,
-            res.content,
-            should_unzip=str(download_type.value).endswith(".zip"),
-        )
+                return
+
+            self._write_content(
+                download_type,
+                res.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE),
+                expected_length=self._get_expected_length(res),
+                should_unzip=str(download_type.value).endswith(".zip"),
+            )
+
+            self._cache.put_validators(download_type.value, res.headers)
+        except CacheException as e:
+            self._logger.warning(f"Could not download {url}: {e}")
+        finally:
+            res.close()
+
+    def _get_expected_length(self, res: "requests.Response") -> Optional[int]:
+        content_length = res.headers.get("Content-Length")
+
+        # `iter_content` decodes compressed bodies, so the header
+        # only tells us how many bytes to expect if there's no encoding
+        if content_length is None or res.headers.get("Content-Encoding") not in [
+            None,
+            "identity",
+        ]:
+            return None
+
+        try:
+            return int(content_length)
+        except ValueError:
+            return None
 
     def _resource_already_exists(self, download_type: DownloadType) -> bool:
         if download_type in [
@@ -101,6 +241,12 @@ class DownloadService(IDownloadService):
         ]:
             return self._cache.exists(download_type.value)
         elif download_type == DownloadType.CsvZip:
+            # lazily downloaded archives stick around until they've been emptied
+            if self._config.should_download_lazily and self._cache.exists(
+                download_type.value
+            ):
+                return True
+
             return all(
                 [
                     self._cache.exists(str(datafile_type.value))
@@ -111,47 +257,125 @@ class DownloadService(IDownloadService):
         return False
 
     def _write_content(
-        self, download_type: DownloadType, content: bytes, should_unzip: bool = False
+        self,
+        download_type: DownloadType,
+        chunks: Iterable[bytes],
+        expected_length: Optional[int] = None,
+        should_unzip: bool = False,
     ) -> None:
-        self._cache.put(content, download_type.value)
+        self._cache.put_stream(
+            chunks, download_type.value, expected_length=expected_length
+        )
+
+        if not should_unzip:
+            return
+
+        zip_path = self._cache.cache_path / Path(download_type.value)
+
+        # the archive itself becomes the cache, and datafiles are read out of it
+        if self._config.should_keep_archive:
+            self._index_archive(zip_path)
+            return
+
+        # members get extracted one by one, as they're asked for
+        if self._config.should_download_lazily:
+            return
 
-        if should_unzip:
-            zip_path = self._cache.cache_path / Path(download_type.value)
+        extraction_path = self._cache.cache_path / Path(EXTRACTION_DIR)
 
-            with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                zip_ref.extractall(self._cache.cache_path)
+        with zipfile.ZipFile(zip_path, "r") as zip_ref:
+            zip_ref.extractall(extraction_path)
 
-            self._move_content()
-            self._cache.remove(zip_path)
+        self._move_content(extraction_path)
+        self._cache.remove(zip_path)
 
-    def _move_content(self) -> None:
-        for path in self._cache.cache_path.iterdir():
+        for datafile_type in DatafileType:
+            self._cache.convert_to_columnar(
+                datafile_type.value,
+                dtypes=self._variable_repo.get_dtypes_for(datafile_type),
+            )
+
+    def _index_archive(self, zip_path: Path) -> None:
+        datafile_names = [datafile_type.value for datafile_type in DatafileType]
+        members: Dict[str, str] = {}
+
+        with zipfile.ZipFile(zip_path, "r") as zip_ref:
+            for info in zip_ref.infolist():
+                if info.is_dir():
+                    continue
+
+                cached_name = self._get_cached_name(PurePosixPath(info.filename).name)
+
+                if cached_name in datafile_names:
+                    members[cached_name] = info.filename
+                elif cached_name == README:
+                    # the readme is tiny, and gets cleaned up in place
+                    self._cache.put(zip_ref.read(info), README)
+
+        self._cache.put_archive_index(zip_path.name, members)
+
+    def _extract_member(self, resource_name: str) -> None:
+        zip_path = self._cache.cache_path / Path(DownloadType.CsvZip.value)
+
+        with zipfile.ZipFile(zip_path, "r") as zip_ref:
+            for info in zip_ref.infolist():
+                if (
+                    info.is_dir()
+                    or self._get_cached_name(PurePosixPath(info.filename).name)
+                    != resource_name
+                ):
+                    continue
+
+                self._logger.debug(f"Extracting {info.filename} as {resource_name}")
+
+                with zip_ref.open(info) as f:
+                    self._cache.put_stream(
+                        iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""),
+                        resource_name,
+                        expected_length=info.file_size,
+                    )
+
+                return
+
+        self._logger.warning(f"{resource_name} does not exist in {zip_path.name}")
+
+    def _remove_archive_if_exhausted(self) -> None:
+        resource_names = [datafile_type.value for datafile_type in DatafileType]
+
+        if all(self._cache.exists(name) for name in resource_names + [README]):
+            self._cache.remove(Path(DownloadType.CsvZip.value))
+
+    def _move_content(self, extraction_path: Path) -> None:
+        for path in extraction_path.iterdir():
             if not path.is_dir():
                 self._rename(path)
                 continue
 
             for sub_path in path.iterdir():
                 self._rename(sub_path)
-            self._cache.remove(path)
+
+        self._cache.remove(extraction_path)
 
     def _rename(self, path: Path) -> None:
-        new_name: str = path.name
-        if "_ae_" in path.name.lower() or "ld" in path.name.lower():
-            new_name = DatafileType.SystemData.value
-        elif "_outlet_" in path.name.lower() or "out" in path.name.lower():
-            new_name = DatafileType.OutletData.value
-        elif "_state_" in path.name.lower() or "sum" in path.name.lower():
-            new_name = DatafileType.SummaryData.value
-        elif "readme" in path.name.lower():
-            new_name = "README.txt"
-
-        self._cache.rename(path, Path(new_name))
+        self._cache.rename(path, Path(self._get_cached_name(path.name)))
+
+    def _get_cached_name(self, name: str) -> str:
+        if "_ae_" in name.lower() or "ld" in name.lower():
+            return DatafileType.SystemData.value
+        elif "_outlet_" in name.lower() or "out" in name.lower():
+            return DatafileType.OutletData.value
+        elif "_state_" in name.lower() or "sum" in name.lower():
+            return DatafileType.SummaryData.value
+        elif "readme" in name.lower():
+            return README
+
+        return name
 
     def _clean_up_readme(self):
         self._logger.debug("Cleaning up readme")
 
         readme_text = self._cache.get(
-            "README.txt",
+            README,
             "txt",
             encoding="utf-8",
             errors="surrogateescape",
@@ -165,5 +389,5 @@ class DownloadService(IDownloadService):
 
         self._cache.put(
             bytes(cleaned_readme_text, "utf-8"),
-            "README.txt",
+            README,
         )
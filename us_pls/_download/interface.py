@@ -1,7 +1,17 @@
 from abc import ABC, abstractmethod
 
+from us_pls._download.models import DatafileType
+
 
 class IDownloadService(ABC):
     @abstractmethod
     def download(self) -> None:
         ...
+
+    @abstractmethod
+    def download_datafile(self, datafile_type: DatafileType) -> None:
+        ...
+
+    @abstractmethod
+    def download_documentation(self) -> None:
+        ...
@@ -0,0 +1,31 @@
+import threading
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    import requests
+
+
+class LazySession:
+    """
+    A shared `requests.Session`, that's only created (and `requests`
+    only imported) once something actually needs to be downloaded.
+    """
+
+    _session: Optional["requests.Session"]
+    _lock: threading.Lock
+
+    def __init__(self) -> None:
+        self._session = None
+        self._lock = threading.Lock()
+
+    def get(self, url: str, **kwargs: Any) -> "requests.Response":
+        return self._get_session().get(url, **kwargs)
+
+    def _get_session(self) -> "requests.Session":
+        with self._lock:
+            if self._session is None:
+                import requests
+
+                self._session = requests.Session()
+
+            return self._session
@@ -1,56 +1,104 @@
+import atexit
 import logging
+import os
+import queue
 import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, Set
 
 from us_pls._logger.filters import ModuleFilter
 
 DEFAULT_LOG_FILE = "us-pls.log"
 
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S%z"
+
+# records are put on a queue by the thread that logs them,
+# and written out (to stdout and the log files) by a listener thread
+_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_queue_handler: Optional[QueueHandler] = None
+_listener: Optional[QueueListener] = None
+_log_files: Set[str] = set()
+
+_configure_lock = threading.Lock()
+
 
 def configure_logger(log_file: str, data_year: int) -> None:
     """
     sets up logger for the project
 
+    This only does anything the first time it's called for a given log file,
+    so creating many surveys in one process doesn't pile up handlers.
+
     Args:
         log_file (str): the name of the file that log output will be sent to
     """
 
-    log_format = (
-        "[PLS_{0} %(levelname)s] %(asctime)s [%(name)s:%(lineno)d] %(message)s".format(
+    global _queue_handler, _listener
+
+    with _configure_lock:
+        if log_file in _log_files:
+            return
+
+        log_format = "[PLS_{0} %(levelname)s] %(asctime)s [%(name)s:%(lineno)d] %(message)s".format(
             data_year
         )
-    )
-    date_format = "%Y-%m-%d %H:%M:%S%z"
-
-    logger = logging.getLogger("us-libraries")
-    logger.setLevel(logging.NOTSET)
-
-    info_stream_handler = logging.StreamHandler(sys.stdout)
-    info_stream_handler.setLevel(logging.INFO)
-    formatter = logging.Formatter(log_format, datefmt=date_format)
-    info_stream_handler.setFormatter(formatter)
-    info_stream_handler.addFilter(ModuleFilter())
-    logger.addHandler(info_stream_handler)
-
-    warning_stream_handler = logging.StreamHandler(sys.stdout)
-    warning_stream_handler.setLevel(logging.WARNING)
-    warning_stream_handler.setFormatter(formatter)
-    logger.addHandler(warning_stream_handler)
-
-    error_stream_handler = logging.StreamHandler(sys.stdout)
-    error_stream_handler.setLevel(logging.ERROR)
-    error_stream_handler.setFormatter(formatter)
-    logger.addHandler(error_stream_handler)
-
-    root_file_handler = logging.FileHandler(log_file)
-    root_file_handler.setLevel(logging.NOTSET)
-    root_file_handler.addFilter(ModuleFilter())
-    root_file_handler.setFormatter(formatter)
-
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format=log_format,
-        handlers=[
-            root_file_handler,
-            info_stream_handler,
-        ],
-    )
+        formatter = logging.Formatter(log_format, datefmt=DATE_FORMAT)
+
+        # the file isn't opened until there's something to write to it
+        file_handler = logging.FileHandler(log_file, delay=True)
+        file_handler.setLevel(logging.NOTSET)
+        file_handler.setFormatter(formatter)
+
+        if _listener is None:
+            info_stream_handler = logging.StreamHandler(sys.stdout)
+            info_stream_handler.setLevel(logging.INFO)
+            info_stream_handler.setFormatter(formatter)
+
+            handlers = [file_handler, info_stream_handler]
+
+            # filtering before records are queued keeps other libraries'
+            # records off of the queue entirely
+            _queue_handler = QueueHandler(_queue)
+            _queue_handler.addFilter(ModuleFilter())
+            # records are only merged with their args here; the listener's
+            # handlers do the actual formatting
+            _queue_handler.setFormatter(logging.Formatter("%(message)s"))
+
+            logging.basicConfig(level=logging.DEBUG, handlers=[_queue_handler])
+
+            atexit.register(_stop_listener)
+        else:
+            # a listener's handlers are fixed once it's started
+            _listener.stop()
+
+            handlers = [*_listener.handlers, file_handler]
+
+        _listener = QueueListener(_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+
+        _log_files.add(log_file)
+
+
+def _stop_listener() -> None:
+    # flushes whatever's still on the queue
+    if _listener is not None:
+        _listener.stop()
+
+
+def _restart_listener_in_child() -> None:
+    global _queue, _listener
+
+    if _listener is None or _queue_handler is None:
+        return
+
+    # the listener thread doesn't survive a fork, and the queue's
+    # lock may have been held by some other thread when we forked
+    _queue = queue.SimpleQueue()
+    _queue_handler.queue = _queue
+
+    _listener = QueueListener(_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+os.register_at_fork(after_in_child=_restart_listener_in_child)
@@ -0,0 +1,93 @@
+import logging
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+import pandas as pd
+
+from us_pls._config import Config
+from us_pls._logger.interface import ILoggerFactory
+from us_pls._persistence.interface import IInMemoryCache
+
+
+class InMemoryCache(IInMemoryCache):
+    _config: Config
+    _logger: logging.Logger
+
+    # least recently used entries come first
+    _entries: "OrderedDict[Hashable, Tuple[pd.DataFrame, int]]"
+    _size_in_bytes: int
+
+    def __init__(self, config: Config, logger_factory: ILoggerFactory) -> None:
+        self._config = config
+        self._logger = logger_factory.get_logger(__name__)
+
+        self._entries = OrderedDict()
+        self._size_in_bytes = 0
+
+    def get(self, key: Hashable) -> Optional[pd.DataFrame]:
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return None
+
+        self._entries.move_to_end(key)
+
+        return self._copy(entry[0])
+
+    def put(self, key: Hashable, df: pd.DataFrame) -> None:
+        if not self._config.should_memoize_stats:
+            return
+
+        size_in_bytes = int(df.memory_usage(deep=True).sum())
+        max_bytes = self._config.memoized_stats_max_bytes
+
+        if max_bytes is not None and size_in_bytes > max_bytes:
+            self._logger.debug(
+                f"Not memoizing {key}: {size_in_bytes} bytes exceeds the {max_bytes} byte budget"
+            )
+            return
+
+        self._evict(key)
+
+        self._entries[key] = (df, size_in_bytes)
+        self._size_in_bytes += size_in_bytes
+
+        if max_bytes is None:
+            return
+
+        while self._size_in_bytes > max_bytes:
+            lru_key = next(iter(self._entries))
+
+            self._logger.debug(f"Evicting {lru_key} from memory")
+
+            self._evict(lru_key)
+
+    def clear(self) -> None:
+        self._logger.debug("Clearing in-memory cache")
+
+        self._entries.clear()
+        self._size_in_bytes = 0
+
+    @property
+    def size_in_bytes(self) -> int:
+        return self._size_in_bytes
+
+    def _evict(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+
+        if entry is not None:
+            self._size_in_bytes -= entry[1]
+
+    def _copy(self, df: pd.DataFrame) -> pd.DataFrame:
+        # callers get their own frame, so that mutating it
+        # can never corrupt what we have memoized. Under pandas'
+        # copy-on-write mode, a shallow copy is already a lazy copy
+        return df.copy(deep=not _is_copy_on_write_enabled())
+
+
+def _is_copy_on_write_enabled() -> bool:
+    try:
+        return bool(pd.get_option("mode.copy_on_write"))  # type: ignore
+    except (KeyError, pd.errors.OptionError):
+        # the option only exists as of pandas 1.5
+        return False
@@ -1,10 +1,24 @@
-from abc import ABC
+from abc import ABC, abstractmethod
 from os import PathLike
 from pathlib import Path
-from typing import Any, Dict, Literal, Optional, Union, overload
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    ContextManager,
+    Iterable,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Union,
+    overload,
+)
 
 import pandas as pd
 
+from us_pls._persistence.models import Filters
+
 
 class IOnDiskCache(ABC):
     _cache_path: Path
@@ -17,6 +31,17 @@ class IOnDiskCache(ABC):
     ) -> None:
         ...
 
+    def put_stream(
+        self,
+        chunks: Iterable[bytes],
+        resource_path: str,
+        expected_length: Optional[int] = None,
+    ) -> None:
+        ...
+
+    def lock(self, resource_path: str) -> ContextManager[None]:
+        ...
+
     @overload
     def get(
         self, resource_path: str, resource_type: Literal["txt"], **kwargs: str
@@ -31,7 +56,12 @@ class IOnDiskCache(ABC):
 
     @overload
     def get(
-        self, resource_path: str, resource_type: Literal["df"]
+        self,
+        resource_path: str,
+        resource_type: Literal["df"],
+        columns: Optional[List[str]] = None,
+        filters: Optional[Filters] = None,
+        dtypes: Optional[Dict[str, str]] = None,
     ) -> Optional[pd.DataFrame]:
         ...
 
@@ -46,6 +76,39 @@ class IOnDiskCache(ABC):
     ) -> None:
         ...
 
+    def collect_garbage(self) -> int:
+        ...
+
+    def get_conditional_headers(self, resource_path: str) -> Dict[str, str]:
+        ...
+
+    def put_validators(
+        self, resource_path: str, response_headers: Mapping[str, str]
+    ) -> None:
+        ...
+
+    def put_archive_index(self, archive_path: str, members: Dict[str, str]) -> None:
+        ...
+
+    def convert_to_columnar(
+        self, resource_path: str, dtypes: Optional[Dict[str, str]] = None
+    ) -> None:
+        ...
+
     @property
     def cache_path(self) -> Path:
         return self._cache_path
+
+
+class IInMemoryCache(ABC):
+    @abstractmethod
+    def get(self, key: Hashable) -> Optional[pd.DataFrame]:
+        ...
+
+    @abstractmethod
+    def put(self, key: Hashable, df: pd.DataFrame) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
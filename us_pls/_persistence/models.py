@@ -0,0 +1,23 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple, Union
+
+
+@dataclass(frozen=True)
+class Between:
+    """
+    An (inclusive) range to filter a column's values on.
+    Either bound can be left out:
+
+    >>> Between(low=10_000)
+    >>> Between(low=10_000, high=50_000)
+    """
+
+    low: Optional[Any] = field(default=None)
+    high: Optional[Any] = field(default=None)
+
+
+# a column's value has to either fall in a range,
+# or be one of the given values
+Condition = Union[Between, Tuple[Any, ...]]
+
+Filters = Dict[str, Condition]
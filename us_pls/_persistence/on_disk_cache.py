@@ -1,16 +1,80 @@
+import hashlib
+import importlib.util
 import json
 import logging
 import os
 import shutil
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from dataclasses import dataclass
 from os import PathLike
 from pathlib import Path
-from typing import Any, Dict, Literal, Optional, Union
+from typing import (
+    IO,
+    Any,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import pandas as pd
 
 from us_pls._config import Config
 from us_pls._logger.interface import ILoggerFactory
 from us_pls._persistence.interface import IOnDiskCache
+from us_pls._persistence.models import Between, Filters
+
+COLUMNAR_SUFFIX = ".parquet"
+
+# PLS datafiles are sorted by state, so smallish row groups
+# let filtered reads skip most of the file
+COLUMNAR_ROW_GROUP_SIZE = 4096
+
+CSV_CHUNK_SIZE = 10_000
+
+# maps cached resource names to the archive member they're read from
+ARCHIVE_INDEX = "archive_index.json"
+
+# HTTP validators are stored next to the resource they validate
+VALIDATORS_SUFFIX = ".validators.json"
+
+# the response header each validator comes from, and the request header it goes in
+VALIDATOR_HEADERS = {
+    "ETag": "If-None-Match",
+    "Last-Modified": "If-Modified-Since",
+}
+
+# pyarrow is an optional dependency; without it we just keep reading CSVs
+IS_COLUMNAR_ENGINE_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+# advisory locks are kept in hidden files next to the resource they guard
+LOCK_SUFFIX = ".lock"
+
+# fcntl only exists on POSIX systems; elsewhere, processes don't wait on each other
+IS_FILE_LOCKING_AVAILABLE = importlib.util.find_spec("fcntl") is not None
+
+# downloads are stored once, by the hash of their content, and shared by every year
+BLOB_DIR = "_blobs"
+BLOB_STORE_LOCK = f"../{BLOB_DIR}"
+
+# maps each of a year's resources to the blob it's stored in
+MANIFEST = "manifest.json"
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class ArchiveMember:
+    archive_path: Path
+    member: str
 
 
 class OnDiskCache(IOnDiskCache):
@@ -28,7 +92,7 @@ class OnDiskCache(IOnDiskCache):
     def exists(self, resource_path: str) -> bool:
         path = self._get_full_path(Path(resource_path))
 
-        return path.exists()
+        return path.exists() or self._get_archive_member(resource_path) is not None
 
     def put(
         self, resource: Union[bytes, Dict[str, Any]], resource_path: str, **kwargs: str
@@ -39,20 +103,95 @@ class OnDiskCache(IOnDiskCache):
 
         if isinstance(resource, bytes):
             self._put_bytes(resource, path, **kwargs)
+
+            if self._config.should_use_blob_store:
+                self._put_blob(path, hashlib.sha256(resource).hexdigest())
         else:
             self._put_json(resource, path, **kwargs)
 
+    def put_stream(
+        self,
+        chunks: Iterable[bytes],
+        resource_path: str,
+        expected_length: Optional[int] = None,
+    ) -> None:
+        path = self._get_full_path(Path(resource_path))
+
+        self._logger.debug(f"Streaming resource into {path}")
+
+        hasher = hashlib.sha256() if self._config.should_use_blob_store else None
+
+        with self._open_atomically(path, "wb") as f:
+            length = 0
+
+            for chunk in chunks:
+                f.write(chunk)
+                length += len(chunk)
+
+                if hasher is not None:
+                    hasher.update(chunk)
+
+            if expected_length is not None and length != expected_length:
+                raise CacheException(
+                    f"Expected {expected_length} bytes for {path}, but received {length}"
+                )
+
+        if hasher is not None:
+            self._put_blob(path, hasher.hexdigest())
+
+    @contextmanager
+    def lock(self, resource_path: str) -> Iterator[None]:
+        if not IS_FILE_LOCKING_AVAILABLE:
+            yield
+            return
+
+        import fcntl
+
+        # resources outside of the year's directory (like "../urls.json")
+        # shouldn't need that directory to exist
+        path = Path(os.path.normpath(self._get_full_path(Path(resource_path))))
+        lock_path = path.with_name(f".{path.name}{LOCK_SUFFIX}")
+
+        with open(lock_path, "a") as f:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self._logger.debug(f"Waiting for another process to release {path}")
+
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
     def get(  # type: ignore
         self,
         resource_path: str,
         resource_type: Union[Literal["df"], Literal["json"], Literal["txt"]],
+        columns: Optional[List[str]] = None,
+        filters: Optional[Filters] = None,
+        dtypes: Optional[Dict[str, str]] = None,
         **kwargs: str,
     ) -> Optional[Union[Dict[str, Any], pd.DataFrame, str]]:
         path = self._get_full_path(Path(resource_path))
 
         if not path.exists():
-            self._logger.debug(f"Cache miss for {path}")
-            return None
+            archive_member = (
+                self._get_archive_member(resource_path)
+                if resource_type == "df"
+                else None
+            )
+
+            if archive_member is None:
+                self._logger.debug(f"Cache miss for {path}")
+                return None
+
+            self._logger.debug(
+                f"Cache hit for {archive_member.member} in {archive_member.archive_path}"
+            )
+
+            return self._read_csv(archive_member, columns, filters, dtypes)
 
         self._logger.debug(f"Cache hit for {path}")
 
@@ -61,7 +200,7 @@ class OnDiskCache(IOnDiskCache):
         elif resource_type == "txt":
             return self._get_txt(path, **kwargs)
         elif resource_type == "df":
-            return pd.read_csv(path)  # type: ignore
+            return self._get_df(path, columns, filters, dtypes)
         else:
             raise CacheException(
                 f'resource_type "{resource_type}" does not match "json", "txt" or "df"'
@@ -74,6 +213,8 @@ class OnDiskCache(IOnDiskCache):
 
         if path.is_dir():
             shutil.rmtree(path)
+        elif self._config.should_use_blob_store:
+            self._remove_blob_backed(path)
         else:
             os.remove(path)
 
@@ -86,22 +227,227 @@ class OnDiskCache(IOnDiskCache):
         self._logger.debug(f"Renaming {from_path} to {to_path}")
         os.rename(from_path, to_path)
 
+        if self._config.should_use_blob_store and to_path.is_file():
+            self._put_blob(to_path, self._hash_file(to_path))
+
+    def collect_garbage(self) -> int:
+        data_path = Path(self._config.data_dir)
+
+        with self.lock(BLOB_STORE_LOCK):
+            referenced_digests = {
+                digest
+                for manifest_path in data_path.glob(f"*/{MANIFEST}")
+                for digest in self._get_json(manifest_path).values()
+            }
+
+            removed = 0
+
+            for blob_path in (data_path / BLOB_DIR).glob("*/*"):
+                if (
+                    blob_path.name.startswith(".")
+                    or blob_path.name in referenced_digests
+                ):
+                    continue
+
+                self._logger.debug(f"Removing unreferenced blob {blob_path}")
+
+                os.remove(blob_path)
+                removed += 1
+
+        return removed
+
+    def get_conditional_headers(self, resource_path: str) -> Dict[str, str]:
+        validators = self.get(self._get_validators_path(resource_path), "json")
+
+        if validators is None:
+            return {}
+
+        return {
+            VALIDATOR_HEADERS[name]: value
+            for name, value in validators.items()
+            if name in VALIDATOR_HEADERS
+        }
+
+    def put_validators(
+        self, resource_path: str, response_headers: Mapping[str, str]
+    ) -> None:
+        validators = {
+            name: response_headers[name]
+            for name in VALIDATOR_HEADERS
+            if response_headers.get(name) is not None
+        }
+
+        validators_path = self._get_validators_path(resource_path)
+
+        if len(validators) > 0:
+            self.put(validators, validators_path)
+        elif self.exists(validators_path):
+            # stale validators would have us skip a changed resource
+            self.remove(Path(validators_path))
+
+    def put_archive_index(self, archive_path: str, members: Dict[str, str]) -> None:
+        self.put(
+            {
+                resource_path: dict(archive=archive_path, member=member)
+                for resource_path, member in members.items()
+            },
+            ARCHIVE_INDEX,
+        )
+
+    def convert_to_columnar(
+        self, resource_path: str, dtypes: Optional[Dict[str, str]] = None
+    ) -> None:
+        path = self._get_full_path(Path(resource_path))
+
+        if not self._should_use_columnar_cache() or not path.exists():
+            return
+
+        self._logger.debug(f"Converting {path} to a columnar file")
+
+        self._put_columnar(
+            self._read_csv(path, dtypes=dtypes), self._get_columnar_path(path)
+        )
+
     def _get_full_path(self, path: Union[Path, PathLike[str]]) -> Path:
         if self._cache_path in Path(path).parents:
             return Path(path)
 
         return self._cache_path / Path(path)
 
+    def _get_validators_path(self, resource_path: str) -> str:
+        return f"{resource_path}{VALIDATORS_SUFFIX}"
+
+    def _get_archive_member(self, resource_path: str) -> Optional[ArchiveMember]:
+        if not self._config.should_keep_archive:
+            return None
+
+        index_path = self._get_full_path(Path(ARCHIVE_INDEX))
+
+        if not index_path.exists():
+            return None
+
+        entry = self._get_json(index_path).get(Path(resource_path).name)
+
+        if entry is None:
+            return None
+
+        return ArchiveMember(
+            archive_path=self._get_full_path(Path(entry["archive"])),
+            member=entry["member"],
+        )
+
+    # blob store helpers
+
+    def _get_blob_path(self, digest: str) -> Path:
+        return Path(self._config.data_dir) / BLOB_DIR / digest[:2] / digest
+
+    def _get_manifest_key(self, path: Path) -> str:
+        return path.relative_to(self._cache_path).as_posix()
+
+    def _get_manifest(self) -> Dict[str, str]:
+        manifest_path = self._cache_path / MANIFEST
+
+        if not manifest_path.exists():
+            return {}
+
+        return self._get_json(manifest_path)
+
+    def _hash_file(self, path: Path) -> str:
+        hasher = hashlib.sha256()
+
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                hasher.update(chunk)
+
+        return hasher.hexdigest()
+
+    def _put_blob(self, path: Path, digest: str) -> None:
+        blob_path = self._get_blob_path(digest)
+
+        with self.lock(BLOB_STORE_LOCK):
+            if blob_path.exists():
+                self._logger.debug(f"{path} is already stored in {blob_path}")
+
+                self._link(blob_path, path)
+            else:
+                blob_path.parent.mkdir(parents=True, exist_ok=True)
+
+                self._link(path, blob_path)
+
+            manifest = self._get_manifest()
+            previous_digest = manifest.get(self._get_manifest_key(path))
+            manifest[self._get_manifest_key(path)] = digest
+
+            self._put_json(manifest, self._cache_path / MANIFEST)
+
+            if previous_digest is not None and previous_digest != digest:
+                self._remove_blob_if_unlinked(previous_digest)
+
+    def _remove_blob_backed(self, path: Path) -> None:
+        with self.lock(BLOB_STORE_LOCK):
+            manifest = self._get_manifest()
+            digest = manifest.pop(self._get_manifest_key(path), None)
+
+            os.remove(path)
+
+            if digest is None:
+                return
+
+            self._put_json(manifest, self._cache_path / MANIFEST)
+            self._remove_blob_if_unlinked(digest)
+
+    def _remove_blob_if_unlinked(self, digest: str) -> None:
+        blob_path = self._get_blob_path(digest)
+
+        # nothing else links to the blob, so there's no sense in keeping it
+        if blob_path.exists() and blob_path.stat().st_nlink == 1:
+            self._logger.debug(f"Removing unlinked blob {blob_path}")
+
+            os.remove(blob_path)
+
+    def _link(self, source: Path, destination: Path) -> None:
+        temp_path = destination.with_name(f".{destination.name}.{os.getpid()}.link")
+
+        try:
+            os.link(source, temp_path)
+        except OSError:
+            # some filesystems can't hard link (or can't across devices)
+            shutil.copyfile(source, temp_path)
+
+        os.replace(temp_path, destination)
+
     # `put` helpers
 
+    @contextmanager
+    def _open_atomically(
+        self, path: Path, mode: str, **kwargs: str
+    ) -> Iterator[IO[Any]]:
+        # the temp file lives next to its destination so that the final
+        # rename stays on one filesystem, and is atomic; that way, readers
+        # only ever see the old file or the whole new one
+        fd, temp_path = tempfile.mkstemp(
+            prefix=f".{path.name}.", suffix=".part", dir=path.parent
+        )
+
+        try:
+            with os.fdopen(fd, mode, **kwargs) as f:
+                yield f
+
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+            raise
+
     def _put_json(
         self, resource: Dict[str, Any], resource_path: Path, **kwargs: str
     ) -> None:
-        with open(resource_path, "w", **kwargs) as f:
+        with self._open_atomically(resource_path, "w", **kwargs) as f:
             json.dump(resource, f)
 
     def _put_bytes(self, resource: bytes, resource_path: Path, **kwargs: str) -> None:
-        with open(resource_path, "wb", **kwargs) as f:
+        with self._open_atomically(resource_path, "wb", **kwargs) as f:
             f.write(resource)
 
     # `get` helpers
@@ -114,6 +460,233 @@ class OnDiskCache(IOnDiskCache):
         with open(resource_path, "r", **kwargs) as f:
             return f.read()
 
+    def _get_df(
+        self,
+        resource_path: Path,
+        columns: Optional[List[str]] = None,
+        filters: Optional[Filters] = None,
+        dtypes: Optional[Dict[str, str]] = None,
+    ) -> pd.DataFrame:
+        if not self._should_use_columnar_cache():
+            return self._read_csv(resource_path, columns, filters, dtypes)
+
+        columnar_path = self._get_columnar_path(resource_path)
+
+        if self._is_columnar_file_fresh(columnar_path, resource_path):
+            self._logger.debug(f"Reading columnar file {columnar_path}")
+
+            return self._read_columnar(columnar_path, columns, filters)
+
+        # we need every row and column to build the columnar file,
+        # so only filter and project once it's been written
+        df = self._read_csv(resource_path, dtypes=dtypes)
+
+        self._put_columnar(df, columnar_path)
+
+        if filters:
+            df = df[self._get_mask(df, filters)].reset_index(drop=True)
+
+        return df if columns is None else self._project(df, columns)
+
+    def _read_csv(
+        self,
+        resource_path: Union[Path, ArchiveMember],
+        columns: Optional[List[str]] = None,
+        filters: Optional[Filters] = None,
+        dtypes: Optional[Dict[str, str]] = None,
+    ) -> pd.DataFrame:
+        read_kwargs: Dict[str, Any] = {}
+
+        if dtypes is not None and self._config.should_use_compact_dtypes:
+            read_kwargs["dtype"] = dtypes
+
+        if columns is not None:
+            # we need the columns we filter on, even if they weren't asked for
+            columns_to_read = set(columns).union((filters or {}).keys())
+
+            # a callable won't blow up on columns that aren't in the file
+            read_kwargs["usecols"] = columns_to_read.__contains__
+
+        try:
+            df = self._read_csv_with_encoding(resource_path, filters, **read_kwargs)
+        except UnicodeDecodeError:
+            # some survey years are published in Windows-1252
+            df = self._read_csv_with_encoding(
+                resource_path, filters, encoding="cp1252", **read_kwargs
+            )
+
+        if self._config.should_use_compact_dtypes:
+            df = self._compact(df, dtypes or {})
+
+        return df if columns is None else self._project(df, columns)
+
+    def _compact(self, df: pd.DataFrame, dtypes: Dict[str, str]) -> pd.DataFrame:
+        # chunks with different categories get concatenated as objects,
+        # so make sure those columns end up as categories again
+        categorical_columns = [
+            col
+            for col, dtype in dtypes.items()
+            if dtype == "category" and col in df.columns and df[col].dtype == object
+        ]
+
+        if len(categorical_columns) > 0:
+            df = df.astype({col: "category" for col in categorical_columns})
+
+        int_columns = df.select_dtypes(include="int64").columns.tolist()
+
+        if len(int_columns) > 0:
+            df[int_columns] = df[int_columns].apply(  # type: ignore
+                pd.to_numeric, downcast="integer"
+            )
+
+        return df
+
+    def _read_csv_with_encoding(
+        self,
+        resource_path: Union[Path, ArchiveMember],
+        filters: Optional[Filters],
+        **read_kwargs: Any,
+    ) -> pd.DataFrame:
+        if isinstance(resource_path, ArchiveMember):
+            # the member is decompressed as it's read, so it never hits the disk
+            with zipfile.ZipFile(resource_path.archive_path, "r") as zip_ref:
+                with zip_ref.open(resource_path.member) as f:
+                    return self._read_csv_from_buffer(f, filters, **read_kwargs)
+
+        return self._read_csv_from_buffer(resource_path, filters, **read_kwargs)
+
+    def _read_csv_from_buffer(
+        self, buffer: Any, filters: Optional[Filters], **read_kwargs: Any
+    ) -> pd.DataFrame:
+        if not filters:
+            return pd.read_csv(buffer, **read_kwargs)  # type: ignore
+
+        # filter as we go, so that we never hold every row in memory
+        filtered_chunks: List[pd.DataFrame] = [
+            chunk[self._get_mask(chunk, filters)]
+            for chunk in pd.read_csv(  # type: ignore
+                buffer, chunksize=CSV_CHUNK_SIZE, **read_kwargs
+            )
+        ]
+
+        return pd.concat(filtered_chunks, ignore_index=True)
+
+    def _get_mask(self, df: pd.DataFrame, filters: Filters) -> "pd.Series[bool]":
+        self._assert_can_filter(filters, df.columns.tolist())
+
+        mask = pd.Series(True, index=df.index)
+
+        for column, condition in filters.items():
+            if isinstance(condition, Between):
+                if condition.low is not None:
+                    mask &= df[column] >= condition.low
+                if condition.high is not None:
+                    mask &= df[column] <= condition.high
+            else:
+                mask &= df[column].isin(condition)
+
+        return mask
+
+    def _assert_can_filter(
+        self, filters: Filters, columns_in_file: Collection[str]
+    ) -> None:
+        missing_columns = [col for col in filters.keys() if col not in columns_in_file]
+
+        if len(missing_columns) > 0:
+            raise CacheException(
+                f"Cannot filter on columns that do not exist in this datafile: {missing_columns}"
+            )
+
+    def _project(self, df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+        available_columns = self._get_available_columns(columns, df.columns.tolist())
+
+        return df[available_columns]
+
+    def _get_available_columns(
+        self, columns: List[str], columns_in_file: Collection[str]
+    ) -> List[str]:
+        available_columns = [col for col in columns if col in columns_in_file]
+
+        if len(available_columns) < len(columns):
+            missing_columns = [col for col in columns if col not in columns_in_file]
+
+            self._logger.warning(
+                f"The following columns do not exist in this datafile: {missing_columns}"
+            )
+
+        return available_columns
+
+    # columnar helpers
+
+    def _should_use_columnar_cache(self) -> bool:
+        return self._config.should_use_columnar_cache and IS_COLUMNAR_ENGINE_AVAILABLE
+
+    def _get_columnar_path(self, resource_path: Path) -> Path:
+        return resource_path.with_suffix(COLUMNAR_SUFFIX)
+
+    def _is_columnar_file_fresh(self, columnar_path: Path, source_path: Path) -> bool:
+        if not columnar_path.exists():
+            return False
+
+        # if the source was re-downloaded, the columnar copy is stale
+        return columnar_path.stat().st_mtime >= source_path.stat().st_mtime
+
+    def _read_columnar(
+        self,
+        columnar_path: Path,
+        columns: Optional[List[str]] = None,
+        filters: Optional[Filters] = None,
+    ) -> pd.DataFrame:
+        if columns is None and not filters:
+            return pd.read_parquet(columnar_path)  # type: ignore
+
+        import pyarrow.parquet as pq
+
+        # only the footer is read here, so this is cheap
+        columns_in_file = set(pq.read_schema(columnar_path).names)
+
+        read_kwargs: Dict[str, Any] = {}
+
+        if columns is not None:
+            read_kwargs["columns"] = self._get_available_columns(
+                columns, columns_in_file
+            )
+
+        if filters:
+            self._assert_can_filter(filters, columns_in_file)
+
+            # these get checked against each row group's statistics,
+            # so row groups without any matches are never read
+            read_kwargs["filters"] = self._to_columnar_filters(filters)
+
+        return pd.read_parquet(columnar_path, **read_kwargs)  # type: ignore
+
+    def _to_columnar_filters(self, filters: Filters) -> List[Tuple[str, str, Any]]:
+        columnar_filters: List[Tuple[str, str, Any]] = []
+
+        for column, condition in filters.items():
+            if isinstance(condition, Between):
+                if condition.low is not None:
+                    columnar_filters.append((column, ">=", condition.low))
+                if condition.high is not None:
+                    columnar_filters.append((column, "<=", condition.high))
+            else:
+                columnar_filters.append((column, "in", list(condition)))
+
+        return columnar_filters
+
+    def _put_columnar(self, df: pd.DataFrame, columnar_path: Path) -> None:
+        self._logger.debug(f"Caching columnar resource in {columnar_path}")
+
+        try:
+            with self._open_atomically(columnar_path, "wb") as f:
+                df.to_parquet(  # type: ignore
+                    f, index=False, row_group_size=COLUMNAR_ROW_GROUP_SIZE
+                )
+        except Exception as e:
+            # a failed conversion should never keep us from serving the CSV
+            self._logger.warning(f"Could not write columnar file {columnar_path}: {e}")
+
     def _init_cache(self):
         self._logger.debug("Setting up cache")
 
@@ -1,24 +1,41 @@
 # pyright: reportUnknownMemberType=false
 
+import importlib.util
 import logging
 import re
-from typing import Dict, List, Union, cast
-
-import bs4
-import requests
-from bs4.element import NavigableString, Tag
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union, cast
 
 from us_pls._config import Config
 from us_pls._logger.interface import ILoggerFactory
 from us_pls._persistence.interface import IOnDiskCache
 from us_pls._scraper.interface import IScrapingService
 
+if TYPE_CHECKING:
+    import bs4
+
 PUBLIC_LIBRARIES_SURVEY_URL = (
     "https://www.imls.gov/research-evaluation/data-collection/public-libraries-survey"
 )
 
 CACHED_URLS_FILE = "../urls.json"
 
+# lxml is an optional dependency; without it we use Python's own parser
+HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") is not None else "html.parser"
+
+# each year's links sit in one of these, after a label like "FY 2017"
+ACCORDION_CLASS = "paragraph--type--accordion"
+YEAR_LABEL_PATTERN = re.compile(r"FY \d{4}")
+
+# each year in the cached index is stored as
+# `{"scraped_at": <seconds since the epoch>, "urls": {<resource>: <url>}}`
+SCRAPED_AT = "scraped_at"
+URLS = "urls"
+
+# only one background refresh should be in flight per process
+_background_refresh_lock = threading.Lock()
+
 
 class ScrapingService(IScrapingService):
     _config: Config
@@ -33,36 +50,192 @@ class ScrapingService(IScrapingService):
         self._cache = cache
 
     def scrape_files(self) -> Dict[str, Dict[str, str]]:
-        cached_urls = self._cache.get(CACHED_URLS_FILE, "json")
+        index = self._get_cached_index()
 
-        if cached_urls is not None and not self._config.should_overwrite_cached_urls:
-            return cached_urls
+        should_refresh = (
+            self._config.should_overwrite_cached_urls
+            or self._config.should_revalidate_cache
+        )
 
-        self._logger.debug("Pulling URLs from web")
+        if index is not None and not should_refresh:
+            if not self._is_stale(index):
+                return self._get_urls(index)
+
+            if self._config.should_refresh_urls_in_background:
+                self._logger.debug("URLs are stale; refreshing them in the background")
+                self._refresh_in_background(index)
+
+                return self._get_urls(index)
+
+            self._logger.debug("URLs are stale")
 
-        scraped_files = self._scrape_files()
+        return self._get_urls(self._refresh(index))
 
-        self._cache.put(scraped_files, CACHED_URLS_FILE)
+    def _refresh(
+        self, index: Optional[Dict[str, Dict[str, Any]]]
+    ) -> Dict[str, Dict[str, Any]]:
+        # only one process sharing the cache scrapes at a time
+        with self._cache.lock(CACHED_URLS_FILE):
+            latest_index = self._get_cached_index()
 
-        return scraped_files
+            # if another process refreshed the URLs while we waited, use what it got
+            if latest_index is not None and (
+                index is None
+                or self._get_last_scraped_at(latest_index)
+                != self._get_last_scraped_at(index)
+            ):
+                self._logger.debug("URLs were refreshed by another process")
+                return latest_index
 
-    def _scrape_files(self) -> Dict[str, Dict[str, str]]:
-        res = requests.get(
-            PUBLIC_LIBRARIES_SURVEY_URL,
+            return self._scrape_index(index)
+
+    def _scrape_index(
+        self, index: Optional[Dict[str, Dict[str, Any]]]
+    ) -> Dict[str, Dict[str, Any]]:
+        self._logger.debug("Pulling URLs from web")
+
+        # if we've scraped before, only pull the page again if it's changed
+        headers = (
+            {}
+            if index is None
+            else self._cache.get_conditional_headers(CACHED_URLS_FILE)
         )
 
+        scraped_files = self._scrape_files(headers)
+        now = time.time()
+
+        if scraped_files is None:
+            self._logger.debug("URLs have not changed since they were last pulled")
+            index = cast(Dict[str, Dict[str, Any]], index)
+
+            # the years that were on the page last time are still on it
+            last_scraped_at = self._get_last_scraped_at(index)
+            refreshed_index = {
+                year: (
+                    {**entry, SCRAPED_AT: now}
+                    if entry[SCRAPED_AT] == last_scraped_at
+                    else entry
+                )
+                for year, entry in index.items()
+            }
+        else:
+            # years that have dropped off of the page keep what we last saw of them
+            refreshed_index = {
+                **(index or {}),
+                **{
+                    year: {SCRAPED_AT: now, URLS: urls}
+                    for year, urls in scraped_files.items()
+                },
+            }
+
+        self._cache.put(refreshed_index, CACHED_URLS_FILE)
+
+        return refreshed_index
+
+    def _refresh_in_background(
+        self, index: Dict[str, Dict[str, Any]]
+    ) -> Optional[threading.Thread]:
+        if not _background_refresh_lock.acquire(blocking=False):
+            self._logger.debug("URLs are already being refreshed")
+            return None
+
+        def refresh() -> None:
+            try:
+                self._refresh(index)
+            except Exception:
+                self._logger.exception("Could not refresh URLs in the background")
+            finally:
+                _background_refresh_lock.release()
+
+        thread = threading.Thread(target=refresh, daemon=True)
+        thread.start()
+
+        return thread
+
+    def _get_cached_index(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        cached_urls = self._cache.get(CACHED_URLS_FILE, "json")
+
+        if cached_urls is None:
+            return None
+
+        # indexes written before years were timestamped are just `{year: urls}`,
+        # so we don't know how old they are
+        return {
+            year: (
+                entry
+                if isinstance(entry.get(URLS), dict)
+                else {SCRAPED_AT: None, URLS: entry}
+            )
+            for year, entry in cast(Dict[str, Dict[str, Any]], cached_urls).items()
+        }
+
+    def _is_stale(self, index: Dict[str, Dict[str, Any]]) -> bool:
+        ttl = self._config.cached_urls_ttl
+
+        if ttl is None:
+            return False
+
+        last_scraped_at = self._get_last_scraped_at(index)
+
+        return last_scraped_at is None or time.time() - last_scraped_at > ttl
+
+    def _get_last_scraped_at(self, index: Dict[str, Dict[str, Any]]) -> Optional[float]:
+        timestamps = [
+            entry[SCRAPED_AT]
+            for entry in index.values()
+            if entry[SCRAPED_AT] is not None
+        ]
+
+        return max(timestamps, default=None)
+
+    def _get_urls(self, index: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+        return {year: entry[URLS] for year, entry in index.items()}
+
+    def _scrape_files(
+        self, headers: Dict[str, str] = {}
+    ) -> Optional[Dict[str, Dict[str, str]]]:
+        # these are only needed when we actually go to the web,
+        # so don't make every `import us_pls` pay for them
+        import bs4
+        import requests
+
+        res = requests.get(PUBLIC_LIBRARIES_SURVEY_URL, headers=headers)
+
+        if res.status_code == 304:
+            return None
+
         if res.status_code != 200:
             msg = f"Got a non-200 status code for {PUBLIC_LIBRARIES_SURVEY_URL}: {res.status_code}"
 
             self._logger.exception(msg)
             raise ScraperException(msg)
 
-        soup = bs4.BeautifulSoup(res.content, "html.parser")
+        # only build the accordions that hold each year's links,
+        # rather than a tree of the whole page
+        url_dict = self._get_url_dict(
+            bs4.BeautifulSoup(
+                res.content,
+                HTML_PARSER,
+                parse_only=bs4.SoupStrainer("div", class_=ACCORDION_CLASS),
+            )
+        )
+
+        if len(url_dict) == 0:
+            self._logger.debug("Could not find any accordions; parsing the whole page")
+
+            url_dict = self._get_url_dict(bs4.BeautifulSoup(res.content, HTML_PARSER))
+
+        self._cache.put_validators(CACHED_URLS_FILE, res.headers)
+
+        return url_dict
+
+    def _get_url_dict(self, soup: "bs4.BeautifulSoup") -> Dict[str, Dict[str, str]]:
+        from bs4.element import NavigableString, Tag
 
         url_dict: Dict[str, Dict[str, str]] = {}
 
         for tag in cast(
-            List[Tag], soup.find_all("label", attrs={"for": re.compile(r"FY \d{4}")})
+            List[Tag], soup.find_all("label", attrs={"for": YEAR_LABEL_PATTERN})
         ):
             year = self._get_year_for_data(cast(str, tag["for"]))
 
@@ -1,15 +1,26 @@
 from abc import ABC, abstractmethod
+from typing import Any, Mapping, Optional, Sequence, Union
 
 import pandas as pd
 
 from us_pls._download.models import DatafileType
+from us_pls._variables.models import Variables
 
 
 class IStatsService(ABC):
     @abstractmethod
-    def get_stats(self, _from: DatafileType) -> pd.DataFrame:
+    def get_stats(
+        self,
+        _from: DatafileType,
+        columns: Optional[Sequence[Union[str, Variables]]] = None,
+        where: Optional[Mapping[str, Any]] = None,
+    ) -> pd.DataFrame:
         ...
 
     @abstractmethod
     def read_docs(self, on: DatafileType) -> None:
         ...
+
+    @abstractmethod
+    def clear_memoized_stats(self) -> None:
+        ...
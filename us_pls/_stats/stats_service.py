@@ -2,22 +2,27 @@
 
 import logging
 import re
-from typing import Dict, List
+from typing import Any, Dict, Hashable, List, Mapping, Optional, Sequence, Union
 
 import pandas as pd
 
 from us_pls._config import Config
 from us_pls._download.models import DatafileType
 from us_pls._logger.interface import ILoggerFactory
-from us_pls._persistence.interface import IOnDiskCache
+from us_pls._persistence.interface import IInMemoryCache, IOnDiskCache
+from us_pls._persistence.models import Between, Filters
 from us_pls._stats.interface import IStatsService
 from us_pls._transformer.interface import ITransformationService
+from us_pls._variables.interface import IVariableRepository
+from us_pls._variables.models import Variables
 
 
 class StatsService(IStatsService):
     _config: Config
     _cache: IOnDiskCache
+    _results_cache: IInMemoryCache
     _transformer: ITransformationService
+    _variable_repo: IVariableRepository
     _logger: logging.Logger
 
     _documentation: Dict[DatafileType, str]
@@ -26,25 +31,70 @@ class StatsService(IStatsService):
         self,
         config: Config,
         cache: IOnDiskCache,
+        results_cache: IInMemoryCache,
         transformer: ITransformationService,
+        variable_repo: IVariableRepository,
         logger_factory: ILoggerFactory,
     ) -> None:
         self._config = config
         self._cache = cache
+        self._results_cache = results_cache
         self._transformer = transformer
+        self._variable_repo = variable_repo
         self._logger = logger_factory.get_logger(__name__)
 
         self._documentation = {}
 
-    def get_stats(self, _from: DatafileType) -> pd.DataFrame:
+    def get_stats(
+        self,
+        _from: DatafileType,
+        columns: Optional[Sequence[Union[str, Variables]]] = None,
+        where: Optional[Mapping[str, Any]] = None,
+    ) -> pd.DataFrame:
         self._logger.debug(f"Getting stats for {_from.value}")
 
-        stats = self._cache.get(_from.value, "df")
+        original_columns = (
+            None
+            if columns is None
+            else self._variable_repo.get_original_columns(_from, columns)
+        )
+        filters = None if where is None else self._get_filters(_from, where)
+
+        key = self._get_memo_key(_from, original_columns, filters)
+
+        memoized_stats = self._results_cache.get(key)
+
+        if memoized_stats is not None:
+            self._logger.debug(f"Using memoized stats for {_from.value}")
+            return memoized_stats
+
+        stats = self._cache.get(
+            _from.value,
+            "df",
+            columns=None
+            if original_columns is None
+            else self._variable_repo.get_year_columns(_from, original_columns),
+            filters=None if filters is None else self._get_year_filters(_from, filters),
+            dtypes=self._variable_repo.get_dtypes_for(_from),
+        )
 
         if stats is None:
             return pd.DataFrame()
 
-        return self._transformer.transform_columns(stats, _from)
+        stats = self._transformer.align_columns(stats, _from, original_columns)
+
+        if self._config.should_convert_sentinels:
+            stats = self._transformer.convert_sentinels(stats, _from)
+
+        transformed_stats = self._transformer.transform_columns(stats, _from)
+
+        self._results_cache.put(key, transformed_stats)
+
+        # hand back the memoized copy, so that the caller
+        # can't mutate what we've stored
+        memoized_stats = self._results_cache.get(key)
+
+        return transformed_stats if memoized_stats is None else memoized_stats
 
     def read_docs(self, on: DatafileType) -> None:
         self._logger.debug(f"Reading docs on {on.value}")
@@ -59,6 +109,52 @@ class StatsService(IStatsService):
 
         print(documentation)
 
+    def clear_memoized_stats(self) -> None:
+        self._results_cache.clear()
+
+    def _get_filters(self, _from: DatafileType, where: Mapping[str, Any]) -> Filters:
+        filters: Filters = {}
+
+        for column, condition in where.items():
+            original_column = self._variable_repo.get_original_columns(_from, [column])[
+                0
+            ]
+
+            if isinstance(condition, Between):
+                filters[original_column] = condition
+            elif isinstance(condition, (list, tuple, set, frozenset)):
+                filters[original_column] = tuple(condition)  # type: ignore
+            else:
+                filters[original_column] = (condition,)
+
+        return filters
+
+    def _get_year_filters(self, _from: DatafileType, filters: Filters) -> Filters:
+        year_filters: Filters = {}
+
+        for column, condition in filters.items():
+            year_columns = self._variable_repo.get_year_columns(_from, [column])
+
+            # a column that was split up that year can't be filtered on as a whole
+            year_column = year_columns[0] if len(year_columns) == 1 else column
+
+            year_filters[year_column] = condition
+
+        return year_filters
+
+    def _get_memo_key(
+        self,
+        _from: DatafileType,
+        original_columns: Optional[List[str]],
+        filters: Optional[Filters],
+    ) -> Hashable:
+        return (
+            self._config.year,
+            _from,
+            None if original_columns is None else tuple(original_columns),
+            None if filters is None else tuple(sorted(filters.items())),
+        )
+
     def _get_documentation(self) -> None:
         if len(self._documentation) > 0:
             self._logger.debug("Already pulled documentation")
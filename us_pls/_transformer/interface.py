@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import List, Optional
 
 import pandas as pd
 
@@ -6,8 +7,23 @@ from us_pls._download.models import DatafileType
 
 
 class ITransformationService(ABC):
+    @abstractmethod
+    def align_columns(
+        self,
+        df: pd.DataFrame,
+        datafile_type: DatafileType,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        ...
+
     @abstractmethod
     def transform_columns(
         self, df: pd.DataFrame, datafile_type: DatafileType
     ) -> pd.DataFrame:
         ...
+
+    @abstractmethod
+    def convert_sentinels(
+        self, df: pd.DataFrame, datafile_type: DatafileType
+    ) -> pd.DataFrame:
+        ...
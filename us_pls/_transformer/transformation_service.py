@@ -1,5 +1,5 @@
 import logging
-from typing import Set
+from typing import Dict, List, Optional, Set
 
 import pandas as pd
 
@@ -8,7 +8,12 @@ from us_pls._download.models import DatafileType
 from us_pls._logger.interface import ILoggerFactory
 from us_pls._transformer.interface import ITransformationService
 from us_pls._variables.interface import IVariableRepository
-from us_pls._variables.models import Variables
+from us_pls._variables.schema import VariableKind
+
+# how the PLS encodes missing values in numeric columns
+# (e.g., -1 for "not applicable", -3 for "closed or temporarily closed",
+# -4 for "suppressed", and -9 for "suppressed for confidentiality")
+SENTINEL_VALUES = [-1, -3, -4, -9]
 
 
 class TransformationService(ITransformationService):
@@ -26,18 +31,42 @@ class TransformationService(ITransformationService):
         self._variable_repo = variable_repo
         self._logger = logger_factory.get_logger(__name__)
 
+    def align_columns(
+        self,
+        df: pd.DataFrame,
+        datafile_type: DatafileType,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Crosswalks a year's original column names onto the
+        newest year's, so that every year has the same schema.
+        If `columns` are given, only those are kept.
+        """
+
+        crosswalk = self._variable_repo.get_crosswalk_for(datafile_type)
+
+        if crosswalk is None:
+            return df
+
+        self._logger.debug(f"Aligning columns for {datafile_type.value}")
+
+        if columns is None:
+            rename_maps = self._variable_repo.get_rename_maps_for(datafile_type)
+
+            return crosswalk.align(df, rename_maps.original_columns)
+
+        return crosswalk.align(df, columns)
+
     def transform_columns(
         self, df: pd.DataFrame, datafile_type: DatafileType
     ) -> pd.DataFrame:
         self._logger.debug(f"Tranformation columns for {datafile_type.value}")
 
-        column_mapping = (
-            self._variable_repo.get_variables_for(datafile_type) or Variables()
-        )
+        rename_maps = self._variable_repo.get_rename_maps_for(datafile_type)
 
-        renamed_df: pd.DataFrame = df.rename(columns=column_mapping.flatten_and_invert())  # type: ignore
+        renamed_df: pd.DataFrame = df.rename(columns=rename_maps.forward)  # type: ignore
 
-        if renamed_df.columns.tolist() != list(column_mapping.values()):
+        if not rename_maps.renamed_column_set.issuperset(renamed_df.columns):
             self._logger.warning(
                 "Not all columns were successfully remapped. See log file for more details."
             )
@@ -45,11 +74,47 @@ class TransformationService(ITransformationService):
             self._log_columns_diff(
                 set(renamed_df.columns.tolist()),
                 set(df.columns.tolist()),
-                set([str(key) for key in column_mapping.keys()]),
+                set(rename_maps.original_columns),
             )
 
         return renamed_df
 
+    def convert_sentinels(
+        self, df: pd.DataFrame, datafile_type: DatafileType
+    ) -> pd.DataFrame:
+        """
+        Swaps the PLS' sentinel values in count columns for
+        (nullable) NAs, so that they don't skew aggregations.
+        This expects the datafile's original column names.
+        """
+
+        self._logger.debug(f"Converting sentinel values for {datafile_type.value}")
+
+        variable_kinds = self._variable_repo.get_variable_kinds_for(datafile_type)
+
+        count_columns: List[str] = [
+            col
+            for col in df.select_dtypes(include="number").columns.tolist()
+            if variable_kinds.get(col) == VariableKind.Count
+        ]
+
+        if len(count_columns) == 0:
+            return df
+
+        counts = df[count_columns]
+
+        # nullable dtypes keep integer columns as integers,
+        # instead of turning them into floats to fit NaNs
+        nullable_dtypes: Dict[str, str] = {
+            col: _to_nullable_dtype(str(dtype)) for col, dtype in counts.dtypes.items()
+        }
+
+        df[count_columns] = counts.astype(nullable_dtypes).mask(  # type: ignore
+            counts.isin(SENTINEL_VALUES)
+        )
+
+        return df
+
     def _log_columns_diff(
         self, renamed_cols: Set[str], original_cols: Set[str], cols_to_rename: Set[str]
     ) -> None:
@@ -62,3 +127,11 @@ class TransformationService(ITransformationService):
         self._logger.debug(
             f"The following mappings were not used to rename any columns: {mappings_not_used_to_rename}"
         )
+
+
+def _to_nullable_dtype(dtype: str) -> str:
+    # e.g., "int16" -> "Int16", "uint8" -> "UInt8", "float64" -> "Float64"
+    if dtype.startswith("uint"):
+        return "UInt" + dtype[len("uint") :]
+
+    return dtype[0].upper() + dtype[1:]
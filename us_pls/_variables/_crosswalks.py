@@ -0,0 +1,17 @@
+from typing import Dict
+
+from us_pls._download.models import DatafileType
+from us_pls._variables.crosswalk import Crosswalk
+
+# how each year's raw column codes line up with those of the newest data
+# dictionary. Years that have neither a data dictionary nor a crosswalk
+# are read as though they used the newest year's codes
+CROSSWALKS: Dict[int, Dict[DatafileType, Crosswalk]] = {
+    # FY2017's datafiles are a subset of FY2018's. FY2018 added `WEBVISIT`,
+    # along with imputation flags for its collection and circulation totals
+    2017: {
+        DatafileType.SummaryData: Crosswalk(),
+        DatafileType.SystemData: Crosswalk(),
+        DatafileType.OutletData: Crosswalk(),
+    },
+}
@@ -1,15 +1,54 @@
-from typing import Dict
+import importlib
+from typing import Dict, Iterator, Mapping
 
 from us_pls._download.models import DatafileType
-from us_pls._variables.fy2018 import outlet_data_vars as outlet
-from us_pls._variables.fy2018 import state_summary_data_vars as state
-from us_pls._variables.fy2018 import system_data_vars as system
 from us_pls._variables.models import Variables
 
-DATA_DICTS: Dict[int, Dict[DatafileType, Variables]] = {
-    2018: {
-        DatafileType.SummaryData: state.STATE_SUMMARY_DATA_VARIABLES,
-        DatafileType.SystemData: system.SYSTEM_DATA_VARIABLES,
-        DatafileType.OutletData: outlet.OUTLET_DATA_VARIABLES,
-    }
+# the package holding each year's variables. Each one needs
+# `state_summary_data_vars`, `system_data_vars` and `outlet_data_vars` modules
+DATA_DICT_PACKAGES: Dict[int, str] = {
+    2018: "us_pls._variables.fy2018",
 }
+
+
+class LazyDataDicts(Mapping[int, Dict[DatafileType, Variables]]):
+    """
+    Maps years to their variables, only importing
+    a year's modules the first time it's looked up.
+    """
+
+    _packages: Mapping[int, str]
+    _loaded: Dict[int, Dict[DatafileType, Variables]]
+
+    def __init__(self, packages: Mapping[int, str]) -> None:
+        self._packages = packages
+        self._loaded = {}
+
+    def __getitem__(self, year: int) -> Dict[DatafileType, Variables]:
+        if year not in self._loaded:
+            package = self._packages[year]
+
+            self._loaded[year] = {
+                DatafileType.SummaryData: importlib.import_module(
+                    f"{package}.state_summary_data_vars"
+                ).STATE_SUMMARY_DATA_VARIABLES,
+                DatafileType.SystemData: importlib.import_module(
+                    f"{package}.system_data_vars"
+                ).SYSTEM_DATA_VARIABLES,
+                DatafileType.OutletData: importlib.import_module(
+                    f"{package}.outlet_data_vars"
+                ).OUTLET_DATA_VARIABLES,
+            }
+
+        return self._loaded[year]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._packages)
+
+    def __len__(self) -> int:
+        return len(self._packages)
+
+
+DATA_DICTS: Mapping[int, Dict[DatafileType, Variables]] = LazyDataDicts(
+    DATA_DICT_PACKAGES
+)
@@ -0,0 +1,82 @@
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Mapping, Sequence, Tuple
+
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class Crosswalk:
+    """
+    Lines up a survey year's raw column codes with the canonical
+    codes (i.e., those of the newest data dictionary).
+    """
+
+    # the year's code -> the canonical code it was later renamed to
+    renames: Mapping[str, str] = field(default_factory=dict)
+    # canonical code -> the year's codes that add up to it
+    splits: Mapping[str, Tuple[str, ...]] = field(default_factory=dict)
+    # the year's codes that have no canonical counterpart
+    dropped: FrozenSet[str] = field(default_factory=frozenset)
+
+    def align(self, df: pd.DataFrame, canonical_columns: Sequence[str]) -> pd.DataFrame:
+        """
+        Renames `df`'s columns to their canonical codes, and reindexes it
+        so that it has exactly `canonical_columns` (in that order), followed
+        by any columns the crosswalk doesn't know about. Canonical columns
+        that didn't exist that year come back as `NaN`s.
+        """
+
+        aligned = df.rename(columns=self.renames) if len(self.renames) > 0 else df
+
+        available_splits = {
+            canonical: list(parts)
+            for canonical, parts in self.splits.items()
+            if set(parts).issubset(aligned.columns)
+        }
+
+        if len(available_splits) > 0:
+            aligned = aligned.assign(
+                **{
+                    canonical: aligned[parts].sum(axis=1, min_count=1)
+                    for canonical, parts in available_splits.items()
+                }
+            )
+
+        known_columns = (
+            set(canonical_columns)
+            .union(self.dropped)
+            .union(part for parts in self.splits.values() for part in parts)
+        )
+
+        return aligned.reindex(
+            columns=list(canonical_columns)
+            + [col for col in aligned.columns if col not in known_columns]
+        )
+
+    def to_year_columns(self, canonical_columns: Sequence[str]) -> List[str]:
+        """
+        Translates canonical codes into the codes
+        that need to be read from this year's datafile.
+        """
+
+        year_columns: List[str] = []
+
+        for col in canonical_columns:
+            if col in self.splits:
+                year_columns += list(self.splits[col])
+            else:
+                year_columns.append(self._inverted_renames.get(col, col))
+
+        return list(dict.fromkeys(year_columns))
+
+    def to_year_dtypes(self, dtypes: Mapping[str, str]) -> Dict[str, str]:
+        # split parts are counts, so pandas can infer them
+        return {
+            self._inverted_renames.get(col, col): dtype
+            for col, dtype in dtypes.items()
+            if col not in self.splits
+        }
+
+    @property
+    def _inverted_renames(self) -> Dict[str, str]:
+        return {canonical: col for col, canonical in self.renames.items()}
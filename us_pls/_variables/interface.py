@@ -1,8 +1,10 @@
 from abc import ABC
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Sequence, Union
 
 from us_pls._download.models import DatafileType
-from us_pls._variables.models import Variables
+from us_pls._variables.crosswalk import Crosswalk
+from us_pls._variables.models import RenameMaps, Variables
+from us_pls._variables.schema import VariableKind
 
 
 class IVariableRepository(ABC):
@@ -15,6 +17,30 @@ class IVariableRepository(ABC):
     def get_variables_for(self, datafile_type: DatafileType) -> Optional[Variables]:
         ...
 
+    def get_variable_kinds_for(
+        self, datafile_type: DatafileType
+    ) -> Dict[str, VariableKind]:
+        ...
+
+    def get_dtypes_for(self, datafile_type: DatafileType) -> Dict[str, str]:
+        ...
+
+    def get_rename_maps_for(self, datafile_type: DatafileType) -> RenameMaps:
+        ...
+
+    def get_crosswalk_for(self, datafile_type: DatafileType) -> Optional[Crosswalk]:
+        ...
+
+    def get_year_columns(
+        self, datafile_type: DatafileType, original_columns: Sequence[str]
+    ) -> List[str]:
+        ...
+
+    def get_original_columns(
+        self, datafile_type: DatafileType, columns: Sequence[Union[str, Variables]]
+    ) -> List[str]:
+        ...
+
     @property
     def summary_data_vars(self) -> Variables:
         return self._summary_data_vars
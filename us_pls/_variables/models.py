@@ -1,20 +1,52 @@
-from typing import Any, Dict, ItemsView, KeysView, Union, ValuesView
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    ItemsView,
+    Iterable,
+    Iterator,
+    KeysView,
+    Mapping,
+    Tuple,
+    Union,
+    ValuesView,
+)
 
 
 class Variables:
+    """
+    An immutable tree of PLS variables. Leaves map a variable's
+    code to its (new) name, and branches group related variables,
+    so that they can be accessed as attributes:
+
+    >>> v = Variables(Population=Variables(POPU_LSA="LegalServiceArea"))
+    >>> v.Population.POPU_LSA
+    'LegalServiceArea'
+
+    Since they never change, instances are hashable, and
+    can safely be shared between years and processes.
+    """
+
+    __slots__ = ("_children", "_hash")
+
+    _children: Mapping[str, Union[str, "Variables"]]
+    _hash: int
+
     def __init__(self, **kwargs: Union[str, "Variables"]) -> None:
-        self.__dict__.update(kwargs)
+        object.__setattr__(self, "_children", MappingProxyType(kwargs))
+        # children are immutable too, so their hashes are already worked out
+        object.__setattr__(self, "_hash", hash(frozenset(kwargs.items())))
 
     @staticmethod
-    def from_dict(d: Dict[str, Any]) -> "Variables":
-        variables = Variables()
-        for k, v in d.items():
-            if isinstance(v, dict):
-                variables[k] = Variables.from_dict(v)
-            else:
-                variables[k] = v
-
-        return variables
+    def from_dict(d: Mapping[str, Any]) -> "Variables":
+        return Variables(
+            **{
+                k: Variables.from_dict(v) if isinstance(v, Mapping) else v
+                for k, v in d.items()
+            }
+        )
 
     def to_dict(
         self, flatten: bool = False, with_imputation_flags: bool = True
@@ -31,34 +63,23 @@ class Variables:
                     dict_res[k] = v.to_dict(with_imputation_flags=with_imputation_flags)
 
             return dict_res
-        else:
-            return self.__to_flat_dict(with_imputation_flags=with_imputation_flags)
-
-    def __to_flat_dict(self, with_imputation_flags: bool) -> Dict[str, str]:
-        dict_res: Dict[str, str] = {}
-
-        for v in self.values():
-            if isinstance(v, str):
-                if v.endswith("_ImputationFlag") and not with_imputation_flags:
-                    continue
-                dict_res[v] = v
-            else:
-                dict_res.update(
-                    v.__to_flat_dict(with_imputation_flags=with_imputation_flags)
-                )
 
-        return dict_res
+        return {
+            v: v
+            for _, _, v in self._walk()
+            if with_imputation_flags or not v.endswith("_ImputationFlag")
+        }
 
     def items(self) -> ItemsView[str, Union[str, "Variables"]]:
-        return self.__dict__.items()
+        return self._children.items()
 
     def keys(self) -> KeysView[str]:
-        return self.__dict__.keys()
+        return self._children.keys()
 
     def values(self) -> ValuesView[Union[str, "Variables"]]:
-        return self.__dict__.values()
+        return self._children.values()
 
-    def flatten_and_invert(self, val_prefix: str = "") -> Dict[str, str]:
+    def flatten_and_invert(self) -> Dict[str, str]:
         """
         Flattens the variable dictionary for renaming pandas
         DataFrame columns:
@@ -70,22 +91,12 @@ class Variables:
         { 'CODE_1': 'First_Second_Value1, 'CODE_2': 'First_Second_Value2' }
         """
 
-        flattened_dict: Dict[str, str] = {}
-
-        for k, v in self.items():
-            if isinstance(v, str):
-                # in this case, we haven't renamed the variable; so don't give
-                # it a fancy name
-                if k == v:
-                    flattened_dict[k] = k
-                else:
-                    flattened_dict[k] = val_prefix + v
-            else:
-                flattened_dict.update(
-                    v.flatten_and_invert(val_prefix=f"{val_prefix}{k}_")
-                )
-
-        return flattened_dict
+        return {
+            # in this case, we haven't renamed the variable; so don't give
+            # it a fancy name
+            code: code if code == name else prefix + name
+            for prefix, code, name in self._walk()
+        }
 
     def reorient(self, val_prefix: str = "") -> "Variables":
         """
@@ -102,28 +113,51 @@ class Variables:
         { 'First': { 'Second': { 'Value': 'First_Second_Value' } } }
         """
 
-        reoriented = Variables()
+        reoriented: Dict[str, Union[str, Variables]] = {}
 
         for k, v in self.items():
             # in this case, the key is the original variable name
             if isinstance(v, str):
-                if v in reoriented.keys():
+                if v in reoriented:
                     raise Exception(f"{v} is already in reoriented")
 
-                if k == v:
-                    # in this case, we haven't renamed the variable; so don't give
-                    # it a fancy name
-                    reoriented[v] = k
-                else:
-                    reoriented[v] = val_prefix + v
+                # if we haven't renamed the variable, don't give it a fancy name
+                reoriented[v] = k if k == v else val_prefix + v
                 continue
 
             reoriented[k] = v.reorient(val_prefix=f"{val_prefix}{k}_")
 
-        return reoriented
+        return Variables(**reoriented)
+
+    def _walk(self, prefix: str = "") -> Iterator[Tuple[str, str, str]]:
+        # yields the prefix, code and name of every leaf, in order
+        for k, v in self.items():
+            if isinstance(v, str):
+                yield prefix, k, v
+            else:
+                yield from v._walk(f"{prefix}{k}_")
+
+    def __getattr__(self, name: str) -> Union[str, "Variables"]:
+        # only called for names that aren't slots or methods
+        try:
+            return object.__getattribute__(self, "_children")[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("Variables are immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("Variables are immutable")
+
+    def __dir__(self) -> Iterable[str]:
+        return [*super().__dir__(), *self.keys()]
 
-    def __setitem__(self, k: str, v: Union[str, "Variables"]) -> None:
-        setattr(self, k, v)
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (_rebuild_variables, (dict(self._children),))
+
+    def __hash__(self) -> int:
+        return self._hash
 
     def __repr__(self) -> str:
         return self.to_dict().__repr__()
@@ -132,14 +166,43 @@ class Variables:
         return self.__repr__()
 
     def __eq__(self, o: object) -> bool:
-        if not isinstance(o, Variables):
-            return False
+        if self is o:
+            return True
 
-        if len(o.items()) != len(self.items()):
+        if not isinstance(o, Variables) or self._hash != o._hash:
             return False
 
-        for k, v in self.items():
-            if v != getattr(o, k, None):
-                return False
+        return self._children == o._children
+
+
+def _rebuild_variables(children: Dict[str, Union[str, Variables]]) -> Variables:
+    return Variables(**children)
 
-        return True
+
+@dataclass(frozen=True)
+class RenameMaps:
+    """
+    Everything needed to rename a datafile's columns,
+    worked out once from its (nested) `Variables`.
+    """
+
+    # original column name -> renamed column name
+    forward: Mapping[str, str]
+    # renamed column name -> original column name
+    inverse: Mapping[str, str]
+    # in data dictionary order
+    original_columns: Tuple[str, ...]
+    renamed_columns: Tuple[str, ...]
+    renamed_column_set: FrozenSet[str]
+
+    @staticmethod
+    def from_variables(variables: Variables) -> "RenameMaps":
+        forward = variables.flatten_and_invert()
+
+        return RenameMaps(
+            forward=MappingProxyType(forward),
+            inverse=MappingProxyType({v: k for k, v in forward.items()}),
+            original_columns=tuple(forward.keys()),
+            renamed_columns=tuple(forward.values()),
+            renamed_column_set=frozenset(forward.values()),
+        )
@@ -1,12 +1,17 @@
 import logging
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Sequence, Union
 
 from us_pls._config import Config
 from us_pls._download.models import DatafileType
 from us_pls._logger.interface import ILoggerFactory
+from us_pls._variables._crosswalks import CROSSWALKS
 from us_pls._variables._data_dicts import DATA_DICTS
+from us_pls._variables.crosswalk import Crosswalk
 from us_pls._variables.interface import IVariableRepository
-from us_pls._variables.models import Variables
+from us_pls._variables.models import RenameMaps, Variables
+from us_pls._variables.schema import VariableKind, get_dtypes, get_variable_kinds
+
+EMPTY_RENAME_MAPS = RenameMaps.from_variables(Variables())
 
 
 class VariableRepository(IVariableRepository):
@@ -14,6 +19,10 @@ class VariableRepository(IVariableRepository):
     _logger: logging.Logger
 
     _data_dict: Dict[DatafileType, Variables]
+    _crosswalks: Dict[DatafileType, Crosswalk]
+    _rename_maps: Dict[DatafileType, RenameMaps]
+    _variable_kinds: Dict[DatafileType, Dict[str, VariableKind]]
+    _dtypes: Dict[DatafileType, Dict[str, str]]
 
     # inherited from parent
     _outlet_data_vars: Variables
@@ -30,8 +39,63 @@ class VariableRepository(IVariableRepository):
     def get_variables_for(self, datafile_type: DatafileType) -> Optional[Variables]:
         return self._data_dict.get(datafile_type)
 
+    def get_variable_kinds_for(
+        self, datafile_type: DatafileType
+    ) -> Dict[str, VariableKind]:
+        return self._variable_kinds.get(datafile_type, {})
+
+    def get_dtypes_for(self, datafile_type: DatafileType) -> Dict[str, str]:
+        return self._dtypes.get(datafile_type, {})
+
+    def get_rename_maps_for(self, datafile_type: DatafileType) -> RenameMaps:
+        return self._rename_maps.get(datafile_type, EMPTY_RENAME_MAPS)
+
+    def get_crosswalk_for(self, datafile_type: DatafileType) -> Optional[Crosswalk]:
+        return self._crosswalks.get(datafile_type)
+
+    def get_year_columns(
+        self, datafile_type: DatafileType, original_columns: Sequence[str]
+    ) -> List[str]:
+        """
+        Translates original (i.e., canonical) column names into
+        the names they go by in this year's datafile.
+        """
+
+        crosswalk = self._crosswalks.get(datafile_type)
+
+        if crosswalk is None:
+            return list(original_columns)
+
+        return crosswalk.to_year_columns(original_columns)
+
+    def get_original_columns(
+        self, datafile_type: DatafileType, columns: Sequence[Union[str, Variables]]
+    ) -> List[str]:
+        """
+        Translates renamed column names (or subtrees of the
+        reoriented variables, e.g., `system_data_vars.OperatingRevenue`)
+        back to the datafile's original column names.
+
+        Names we don't have a mapping for are assumed to
+        already be original column names.
+        """
+
+        mapping = self.get_rename_maps_for(datafile_type).inverse
+
+        new_cols: List[str] = []
+
+        for column in columns:
+            if isinstance(column, str):
+                new_cols.append(column)
+            else:
+                new_cols += list(column.to_dict(flatten=True).keys())
+
+        # dedupe, but keep the order the columns were asked for in
+        return list(dict.fromkeys([mapping.get(col, col) for col in new_cols]))
+
     def _init_repository(self) -> None:
         self._data_dict = self._get_data_dict_for_year()
+        self._crosswalks = CROSSWALKS.get(self._config.year, {})
 
         self._summary_data_vars = self._data_dict.get(
             DatafileType.SummaryData, Variables()
@@ -43,12 +107,22 @@ class VariableRepository(IVariableRepository):
             DatafileType.OutletData, Variables()
         ).reorient()
 
+        self._rename_maps = {}
         self._new_col_to_original_col_mapping = {}
+        self._variable_kinds = {}
+        self._dtypes = {}
 
         for k, v in self._data_dict.items():
-            self._new_col_to_original_col_mapping[k] = {
-                _v: _k for _k, _v in v.flatten_and_invert().items()
-            }
+            self._rename_maps[k] = RenameMaps.from_variables(v)
+            self._new_col_to_original_col_mapping[k] = dict(
+                self._rename_maps[k].inverse
+            )
+            self._variable_kinds[k] = get_variable_kinds(v)
+            self._dtypes[k] = get_dtypes(self._variable_kinds[k])
+
+            # dtypes are used when reading the datafile, so they need its names
+            if k in self._crosswalks:
+                self._dtypes[k] = self._crosswalks[k].to_year_dtypes(self._dtypes[k])
 
     def _get_data_dict_for_year(self) -> Dict[DatafileType, Variables]:
         dict_res = DATA_DICTS.get(self._config.year)
@@ -58,6 +132,13 @@ class VariableRepository(IVariableRepository):
 
         max_key = max(DATA_DICTS.keys())
 
+        if self._config.year in CROSSWALKS:
+            self._logger.debug(
+                f"Crosswalking variables for year {self._config.year} to {max_key}"
+            )
+
+            return DATA_DICTS[max_key]
+
         self._logger.warning(
             f"Could not get variable data for year {self._config.year}. Getting variables for {max_key} instead"
         )
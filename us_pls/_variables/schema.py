@@ -0,0 +1,118 @@
+from enum import Enum
+from typing import Dict
+
+from us_pls._variables.models import Variables
+
+
+class VariableKind(Enum):
+    # imputation flags, e.g., `F_POPLSA`
+    Flag = "flag"
+    # categorical codes, e.g., `C_LEGBAS` or `LOCALE`
+    Code = "code"
+    # identifiers that only look numeric, e.g., `FSCSKEY` or `ZIP`
+    Identifier = "identifier"
+    # free text, dates and coordinates
+    Descriptive = "descriptive"
+    # everything else: counts and dollar amounts
+    Count = "count"
+
+
+CODE_VARIABLES = {
+    "STABR",
+    "C_RELATN",
+    "C_LEGBAS",
+    "C_ADMIN",
+    "C_FSCS",
+    "C_OUT_TY",
+    "GEOCODE",
+    "LSABOUND",
+    "LOCALE",
+    "LOCALE_ADD",
+    "LOCALE_MOD",
+    "REAPLOCALE",
+    "REAPLOCALE_ADD",
+    "REAPLOCALE_MOD",
+    "OBEREG",
+    "RSTATUS",
+    "STATSTRU",
+    "STATNAME",
+    "STATADDR",
+    "INCITSST",
+    "INCITSCO",
+    "MICROF",
+    "GEOMATCH",
+}
+
+IDENTIFIER_VARIABLES = {
+    "FSCSKEY",
+    "FSCS_SEQ",
+    "LIBID",
+    "ZIP",
+    "ZIP4",
+    "ZIP_M",
+    "ZIP4_M",
+    "PHONE",
+    "GNISPLAC",
+    "CENTRACT",
+    "CENBLOCK",
+    "CDCODE",
+    "CBSA",
+}
+
+DESCRIPTIVE_VARIABLES = {
+    "LIBNAME",
+    "ADDRESS",
+    "CITY",
+    "ADDRES_M",
+    "CITY_M",
+    "CNTY",
+    "STARTDAT",
+    "ENDDATE",
+    "YR_SUB",
+    "LONGITUD",
+    "LATITUDE",
+}
+
+KIND_TO_DTYPE: Dict[VariableKind, str] = {
+    VariableKind.Flag: "category",
+    VariableKind.Code: "category",
+    # read as strings, so that we don't lose leading zeros
+    VariableKind.Identifier: "str",
+}
+
+
+def get_variable_kinds(variables: Variables) -> Dict[str, VariableKind]:
+    """
+    Classifies each of a datafile's (original) columns
+    based on its variable definition:
+
+    >>> get_variable_kinds(Variables(Population=Variables(POPU_LSA="LegalServiceArea", F_POPLSA="LegalServiceArea_ImputationFlag")))
+    { 'POPU_LSA': VariableKind.Count, 'F_POPLSA': VariableKind.Flag }
+    """
+
+    kinds: Dict[str, VariableKind] = {}
+
+    for original_col, new_col in variables.flatten_and_invert().items():
+        if new_col.endswith("_ImputationFlag") or original_col.startswith("F_"):
+            kinds[original_col] = VariableKind.Flag
+        elif original_col in CODE_VARIABLES:
+            kinds[original_col] = VariableKind.Code
+        elif original_col in IDENTIFIER_VARIABLES:
+            kinds[original_col] = VariableKind.Identifier
+        elif original_col in DESCRIPTIVE_VARIABLES:
+            kinds[original_col] = VariableKind.Descriptive
+        else:
+            kinds[original_col] = VariableKind.Count
+
+    return kinds
+
+
+def get_dtypes(kinds: Dict[str, VariableKind]) -> Dict[str, str]:
+    """
+    Builds the dtypes to read a datafile's columns with. Columns
+    whose dtype is best inferred (e.g., counts) are left out.
+    """
+
+    return {
+        col: KIND_TO_DTYPE[kind] for col, kind in kinds.items() if kind in KIND_TO_DTYPE
+    }
@@ -1,6 +1,9 @@
 # pyright: reportUnknownMemberType=false
 
-from typing import Dict
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
 
 import pandas as pd
 import punq
@@ -10,10 +13,12 @@ from us_pls._config import DEFAULT_DATA_DIR, Config
 from us_pls._download.download_service import DownloadService
 from us_pls._download.interface import IDownloadService
 from us_pls._download.models import DatafileType
+from us_pls._download.session import LazySession
 from us_pls._logger.configure_logger import DEFAULT_LOG_FILE, configure_logger
 from us_pls._logger.factory import LoggerFactory
 from us_pls._logger.interface import ILoggerFactory
-from us_pls._persistence.interface import IOnDiskCache
+from us_pls._persistence.in_memory_cache import InMemoryCache
+from us_pls._persistence.interface import IInMemoryCache, IOnDiskCache
 from us_pls._persistence.on_disk_cache import OnDiskCache
 from us_pls._scraper.interface import IScrapingService
 from us_pls._scraper.scraping_service import ScrapingService
@@ -25,6 +30,8 @@ from us_pls._variables.interface import IVariableRepository
 from us_pls._variables.models import Variables
 from us_pls._variables.repository import VariableRepository
 
+YEAR_COLUMN = "Year"
+
 
 class PublicLibrariesSurvey:
     _client: LibrariesClient
@@ -37,6 +44,17 @@ class PublicLibrariesSurvey:
         log_file: str = DEFAULT_LOG_FILE,
         should_overwrite_cached_urls: bool = False,
         should_overwrite_existing_cache: bool = False,
+        should_revalidate_cache: bool = False,
+        cached_urls_ttl: Optional[float] = None,
+        should_refresh_urls_in_background: bool = False,
+        should_use_columnar_cache: bool = True,
+        should_use_compact_dtypes: bool = True,
+        should_convert_sentinels: bool = False,
+        should_download_lazily: bool = False,
+        should_keep_archive: bool = False,
+        should_use_blob_store: bool = False,
+        should_memoize_stats: bool = True,
+        memoized_stats_max_bytes: Optional[int] = None,
     ) -> None:
         config = Config(
             year=year,
@@ -44,35 +62,66 @@ class PublicLibrariesSurvey:
             log_file=log_file,
             should_overwrite_cached_urls=should_overwrite_cached_urls,
             should_overwrite_existing_cache=should_overwrite_existing_cache,
+            should_revalidate_cache=should_revalidate_cache,
+            cached_urls_ttl=cached_urls_ttl,
+            should_refresh_urls_in_background=should_refresh_urls_in_background,
+            should_use_columnar_cache=should_use_columnar_cache,
+            should_use_compact_dtypes=should_use_compact_dtypes,
+            should_convert_sentinels=should_convert_sentinels,
+            should_download_lazily=should_download_lazily,
+            should_keep_archive=should_keep_archive,
+            should_use_blob_store=should_use_blob_store,
+            should_memoize_stats=should_memoize_stats,
+            memoized_stats_max_bytes=memoized_stats_max_bytes,
         )
 
         self._config = config
 
-        container = punq.Container()
+        configure_logger(log_file, year)
 
-        # singletons
-        container.register(Config, instance=config)
+        self._client = _build_container(config).resolve(LibrariesClient)
 
-        # services
-        container.register(ILoggerFactory, LoggerFactory)
-        container.register(IScrapingService, ScrapingService)
-        container.register(IDownloadService, DownloadService)
-        container.register(IStatsService, StatsService)
-        container.register(IOnDiskCache, OnDiskCache)
-        container.register(ITransformationService, TransformationService)
-        container.register(IVariableRepository, VariableRepository)
-        container.register(LibrariesClient)
+    @classmethod
+    def range(
+        cls,
+        start: int,
+        end: int,
+        max_workers: Optional[int] = None,
+        **kwargs: Any,
+    ) -> "PublicLibrariesSurveyPanel":
+        """
+        Loads the surveys from `start` up to (but not including) `end`,
+        so that they can be queried together.
 
-        configure_logger(log_file, year)
+        `kwargs` are passed on to each year's `PublicLibrariesSurvey`.
+        """
 
-        self._client = container.resolve(LibrariesClient)
+        return PublicLibrariesSurveyPanel(
+            range(start, end), max_workers=max_workers, **kwargs
+        )
 
-    def get_stats(self, _from: DatafileType) -> pd.DataFrame:
-        return self._client.get_stats(_from)
+    def get_stats(
+        self,
+        _from: DatafileType,
+        columns: Optional[Sequence[Union[str, Variables]]] = None,
+        where: Optional[Mapping[str, Any]] = None,
+    ) -> pd.DataFrame:
+        return self._client.get_stats(_from, columns=columns, where=where)
 
     def read_docs(self, on: DatafileType) -> None:
         return self._client.read_docs(on)
 
+    def clear_memoized_stats(self) -> None:
+        self._client.clear_memoized_stats()
+
+    def collect_garbage(self) -> int:
+        """
+        Removes downloads in the blob store that no survey year uses anymore,
+        and returns how many were removed.
+        """
+
+        return self._client.collect_garbage()
+
     @property
     def summary_data_vars(self) -> Variables:
         return self._client.summary_data_vars
@@ -94,3 +143,127 @@ class PublicLibrariesSurvey:
 
     def __str__(self) -> str:
         return self.__repr__()
+
+
+class PublicLibrariesSurveyPanel:
+    _years: List[int]
+    _max_workers: Optional[int]
+    _survey_kwargs: Dict[str, Any]
+    _logger: logging.Logger
+
+    def __init__(
+        self, years: Sequence[int], max_workers: Optional[int] = None, **kwargs: Any
+    ) -> None:
+        if len(years) == 0:
+            raise PanelException("A panel needs at least one year")
+
+        self._years = sorted(set(years))
+        self._max_workers = max_workers
+
+        # scrape once up front, and have every year read the URLs we stored
+        config = Config(year=self._years[0], **kwargs)
+        configure_logger(config.log_file, config.year)
+        self._logger = LoggerFactory().get_logger(__name__)
+
+        _build_container(config).resolve(IScrapingService).scrape_files()
+
+        self._survey_kwargs = {**kwargs, "should_overwrite_cached_urls": False}
+
+        # with lazy downloads, there's nothing to do until data is asked for
+        if not config.should_download_lazily:
+            self._map(_init_survey)
+
+    def get_stats(
+        self,
+        _from: DatafileType,
+        columns: Optional[Sequence[Union[str, Variables]]] = None,
+        where: Optional[Mapping[str, Any]] = None,
+    ) -> pd.DataFrame:
+        """
+        Gets stats for every year in the panel, stacked
+        into one frame with a `Year` column.
+
+        Columns that only exist in some years are filled in with `NaN`s.
+        """
+
+        frames: List[pd.DataFrame] = []
+
+        for year, frame in zip(
+            self._years,
+            self._map(
+                _get_stats_for_year, repeat(_from), repeat(columns), repeat(where)
+            ),
+        ):
+            if len(frame) == 0:
+                self._logger.warning(f"There are no stats for {year}")
+                continue
+
+            frame.insert(0, YEAR_COLUMN, year)
+            frames.append(frame)
+
+        if len(frames) == 0:
+            return pd.DataFrame()
+
+        return pd.concat(frames, ignore_index=True, sort=False)
+
+    @property
+    def years(self) -> List[int]:
+        return list(self._years)
+
+    def _map(self, fn: Any, *args: Any) -> List[Any]:
+        # each year gets its own process, since parsing is CPU bound
+        with ProcessPoolExecutor(max_workers=self._max_workers) as executor:
+            return list(
+                executor.map(fn, self._years, repeat(self._survey_kwargs), *args)
+            )
+
+    def __repr__(self) -> str:
+        return f"<PublicLibrariesSurveyPanel {self._years[0]}-{self._years[-1]}>"
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+
+def _build_container(config: Config) -> punq.Container:
+    container = punq.Container()
+
+    # singletons
+    container.register(Config, instance=config)
+    container.register(LazySession, instance=LazySession())
+
+    # services
+    container.register(ILoggerFactory, LoggerFactory)
+    container.register(IScrapingService, ScrapingService)
+    container.register(IDownloadService, DownloadService)
+    container.register(IStatsService, StatsService)
+    container.register(IOnDiskCache, OnDiskCache)
+    container.register(IInMemoryCache, InMemoryCache)
+    container.register(ITransformationService, TransformationService)
+    container.register(IVariableRepository, VariableRepository)
+    container.register(LibrariesClient)
+
+    return container
+
+
+# these run in worker processes, so they need to be importable at module level
+
+
+def _init_survey(year: int, kwargs: Dict[str, Any]) -> None:
+    PublicLibrariesSurvey(year, **kwargs)
+
+
+def _get_stats_for_year(
+    year: int,
+    kwargs: Dict[str, Any],
+    _from: DatafileType,
+    columns: Optional[Sequence[Union[str, Variables]]],
+    where: Optional[Mapping[str, Any]],
+) -> pd.DataFrame:
+    return PublicLibrariesSurvey(year, **kwargs).get_stats(
+        _from, columns=columns, where=where
+    )
+
+
+class PanelException(Exception):
+    def __init__(self, *args: object) -> None:
+        super().__init__(*args)